@@ -0,0 +1,316 @@
+# agg_utils.py
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from utils import get_filter_index, cell_mask, per_version_resource, session_filters
+
+# Ukuran yang diringkas di kubus KPI (count, sum, sum of squares per sel)
+CUBE_MEASURES = ["Gaji", "IPK", "Masa Tunggu Kerja"]
+# Kolom kategorikal non-filter yang frekuensinya disimpan per sel
+CUBE_CATEGORIES = ["Bidang Industri", "Provinsi"]
+
+def build_kpi_cube(df: pd.DataFrame, index: dict) -> dict:
+    """Per-cell sufficient statistics over the filter index cells.
+
+    A "cell" is one combination of the four global filter values, so any
+    filter state can be answered by summing the selected cells.
+    """
+    cell = index["cell"]
+    n_cells = len(index["cell_codes"])
+    measures = {}
+    for col in CUBE_MEASURES:
+        if col not in df.columns:
+            continue
+        values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+        valid = ~np.isnan(values)
+        v = np.where(valid, values, 0.0)
+        measures[col] = {
+            "n": np.bincount(cell, weights=valid, minlength=n_cells),
+            "sum": np.bincount(cell, weights=v, minlength=n_cells),
+            "sumsq": np.bincount(cell, weights=v * v, minlength=n_cells),
+        }
+
+    categories = {}
+    for col in CUBE_CATEGORIES:
+        if col not in df.columns:
+            continue
+        codes, uniques = pd.factorize(df[col], sort=True)
+        n_vals = len(uniques) + 1  # slot 0 = missing
+        flat = np.bincount(cell.astype(np.int64) * n_vals + (codes + 1), minlength=n_cells * n_vals)
+        categories[col] = {
+            "values": uniques.tolist(),
+            "counts": flat.reshape(n_cells, n_vals),
+        }
+
+    return {"measures": measures, "categories": categories}
+
+def get_kpi_cube(df: pd.DataFrame) -> dict:
+    """KPI cube for df, built once per dataset version."""
+    return per_version_resource(df, "kpi_cube", lambda d: build_kpi_cube(d, get_filter_index(d)))
+
+def _measure_stats(m: dict, mask) -> dict:
+    n, s, ss = (m[k] if mask is None else m[k][mask] for k in ("n", "sum", "sumsq"))
+    n, s, ss = n.sum(), s.sum(), ss.sum()
+    if n == 0:
+        return {"n": 0, "mean": None, "std": None}
+    mean = s / n
+    var = (ss - n * mean * mean) / (n - 1) if n > 1 else 0.0
+    return {"n": int(n), "mean": float(mean), "std": float(np.sqrt(max(var, 0.0)))}
+
+def rollup_kpis(df: pd.DataFrame, filters: dict = None) -> dict:
+    """Overview KPIs for a filter state, answered from cube cells only."""
+    if filters is None:
+        filters = session_filters()
+    index = get_filter_index(df)
+    cube = get_kpi_cube(df)
+    mask = cell_mask(index, filters)
+
+    counts = index["cell_counts"] if mask is None else index["cell_counts"][mask]
+    result = {"count": int(counts.sum()), "measures": {}, "overall": {}, "top": {}, "counts": {}}
+    for col, m in cube["measures"].items():
+        result["measures"][col] = _measure_stats(m, mask)
+        result["overall"][col] = _measure_stats(m, None)
+
+    for col, c in cube["categories"].items():
+        totals = (c["counts"] if mask is None else c["counts"][mask]).sum(axis=0)[1:]
+        result["counts"][col] = pd.Series(totals, index=c["values"], name="Jumlah")
+        if totals.sum() > 0:
+            i = int(np.argmax(totals))
+            result["top"][col] = (c["values"][i], int(totals[i]))
+
+    # Kolom filter (mis. Lokasi Geografis): frekuensi langsung dari kode sel
+    for key, dim in index["dims"].items():
+        d = index["dim_order"].index(key)
+        codes = index["cell_codes"][:, d] if mask is None else index["cell_codes"][mask, d]
+        totals = np.bincount(codes, weights=counts, minlength=len(dim["values"]) + 1)[1:]
+        if totals.sum() > 0:
+            i = int(np.argmax(totals))
+            result["top"][dim["column"]] = (dim["values"][i], int(totals[i]))
+    return result
+
+def cube_group_moments(df: pd.DataFrame, column: str, measure: str, filters: dict = None):
+    """Per-value n/sum/sumsq of measure for a filter column, merged from cube cells.
+
+    Returns (labels, {"n", "sum", "sumsq"}) or None when column is not a
+    filter dimension or measure is not in the cube.
+    """
+    if filters is None:
+        filters = session_filters()
+    index = get_filter_index(df)
+    cube = get_kpi_cube(df)
+    key = next((k for k, dim in index["dims"].items() if dim["column"] == column), None)
+    if key is None or measure not in cube["measures"]:
+        return None
+    mask = cell_mask(index, filters)
+    d = index["dim_order"].index(key)
+    codes = index["cell_codes"][:, d] if mask is None else index["cell_codes"][mask, d]
+    n_vals = len(index["dims"][key]["values"]) + 1  # slot 0 = missing
+    moments = {}
+    for stat, per_cell in cube["measures"][measure].items():
+        w = per_cell if mask is None else per_cell[mask]
+        moments[stat] = np.bincount(codes, weights=w, minlength=n_vals)[1:]
+    return list(index["dims"][key]["values"]), moments
+
+# -------------------------------------------------
+# Insight otomatis (Ringkasan EDA & Korelasi)
+# -------------------------------------------------
+STRONG_CORR = 0.5
+
+@dataclass
+class InsightSummary:
+    """Result of compute_insights; cheap to cache per filter state."""
+    numeric: pd.DataFrame                            # index = kolom; mean/median/min/max
+    categorical: list = field(default_factory=list)  # (kolom, kategori teratas, jumlah, rasio)
+    strong_corr: list = field(default_factory=list)  # (a, b, r) dengan |r| >= STRONG_CORR
+
+def _top_category(s: pd.Series):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        counts = np.bincount(s.cat.codes.to_numpy() + 1, minlength=len(s.cat.categories) + 1)[1:]
+        labels = s.cat.categories
+    else:
+        codes, labels = pd.factorize(s)
+        counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    total = counts.sum()
+    if total == 0:
+        return None
+    i = int(np.argmax(counts))
+    return labels[i], int(counts[i]), counts[i] / total
+
+def compute_insights(d: pd.DataFrame, max_categorical: int = 3) -> InsightSummary:
+    """Univariate stats for all numeric columns in one block pass, top
+    categories via code counts, and strong correlations from the upper
+    triangle of the correlation matrix only."""
+    num_cols = d.select_dtypes(include=["number"]).columns.tolist()
+    cat_cols = d.select_dtypes(exclude=["number"]).columns.tolist()
+
+    numeric = pd.DataFrame(columns=["mean", "median", "min", "max"], dtype="float64")
+    strong = []
+    if num_cols:
+        X = d[num_cols].to_numpy(dtype="float64", na_value=np.nan)
+        has_values = ~np.all(np.isnan(X), axis=0) if len(X) else np.zeros(len(num_cols), dtype=bool)
+        cols = [c for c, ok in zip(num_cols, has_values) if ok]
+        X = X[:, has_values]
+        if cols:
+            numeric = pd.DataFrame({
+                "mean": np.nanmean(X, axis=0),
+                "median": np.nanmedian(X, axis=0),
+                "min": np.nanmin(X, axis=0),
+                "max": np.nanmax(X, axis=0),
+            }, index=cols)
+        if len(cols) >= 2:
+            if np.isnan(X).any():
+                corr = d[cols].corr().to_numpy()  # pairwise-complete seperti sebelumnya
+            else:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    corr = np.corrcoef(X, rowvar=False)
+            iu, ju = np.triu_indices(len(cols), k=1)
+            r = corr[iu, ju]
+            hit = np.abs(r) >= STRONG_CORR
+            strong = [(cols[i], cols[j], float(v)) for i, j, v in zip(iu[hit], ju[hit], r[hit])]
+
+    categorical = []
+    for col in cat_cols[:max_categorical]:
+        top = _top_category(d[col])
+        if top is not None:
+            categorical.append((col,) + top)
+    return InsightSummary(numeric=numeric, categorical=categorical, strong_corr=strong)
+
+# -------------------------------------------------
+# Ringkasan boxplot sisi server (kuartil, whisker, outlier, sampel)
+# -------------------------------------------------
+BOX_SAMPLE_POINTS = 1500   # total titik jitter yang dikirim ke browser
+BOX_MAX_OUTLIERS = 200     # batas outlier per grup
+
+def group_codes(s: pd.Series):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy().astype(np.int64), list(s.cat.categories)
+    codes, uniques = pd.factorize(s, sort=True)
+    return codes.astype(np.int64), uniques.tolist()
+
+def _segment_quantile(sorted_vals, starts, sizes, q: float) -> np.ndarray:
+    """Linear-interpolated quantile for each sorted segment (numpy default method)."""
+    pos = (sizes - 1) * q
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, sizes - 1)
+    frac = pos - lo
+    return sorted_vals[starts + lo] * (1 - frac) + sorted_vals[starts + hi] * frac
+
+def grouped_stats(d: pd.DataFrame, group_col: str, value_col: str) -> dict:
+    """Fused per-group count, sum, mean and quartiles over category codes.
+
+    One lexsort by (code, value) gives contiguous sorted segments; sums come
+    from a weighted bincount and quantiles are read straight off the
+    segments, so no per-group Python objects are materialized.
+    """
+    codes, labels = group_codes(d[group_col])
+    values = d[value_col].to_numpy(dtype="float64", na_value=np.nan)
+    ok = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[ok], values[ok]
+
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    sizes_all = np.bincount(codes, minlength=len(labels))
+    sums_all = np.bincount(codes, weights=values, minlength=len(labels))
+    present = np.flatnonzero(sizes_all)
+    sizes = sizes_all[present]
+    starts = (np.cumsum(sizes_all) - sizes_all)[present]
+
+    return {
+        "groups": [labels[g] for g in present],
+        "count": sizes,
+        "sum": sums_all[present],
+        "mean": sums_all[present] / sizes,
+        "q1": _segment_quantile(values, starts, sizes, 0.25),
+        "median": _segment_quantile(values, starts, sizes, 0.5),
+        "q3": _segment_quantile(values, starts, sizes, 0.75),
+        # Segmen terurut, dipakai ulang oleh box_summary (jangan di-cache)
+        "sorted_values": values,
+        "starts": starts,
+    }
+
+def group_means(stats: dict, group_col: str, value_col: str) -> pd.DataFrame:
+    return pd.DataFrame({group_col: stats["groups"], value_col: stats["mean"]})
+
+def top_n_counts(s: pd.Series, name: str, n: int = 10) -> pd.DataFrame:
+    """Top-n value counts via argpartition (no full sort of all values)."""
+    codes, labels = group_codes(s)
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    nonzero = np.flatnonzero(counts)
+    if len(nonzero) > n:
+        nonzero = nonzero[np.argpartition(-counts[nonzero], n - 1)[:n]]
+    # Urutkan hanya n kandidat: jumlah menurun, lalu urutan kategori
+    top = nonzero[np.lexsort((nonzero, -counts[nonzero]))]
+    return pd.DataFrame({name: [labels[i] for i in top], "Jumlah": counts[top]})
+
+def box_summary(d: pd.DataFrame, group_col: str, value_col: str,
+                sample_points: int = BOX_SAMPLE_POINTS, seed: int = 42, stats: dict = None) -> dict:
+    """Per-group quartiles, Tukey whiskers, capped outliers and a stratified sample.
+
+    Payload size depends on the number of groups and the sample caps, not
+    on the number of rows. Pass ``stats`` from grouped_stats to reuse its sort.
+    """
+    if stats is None:
+        stats = grouped_stats(d, group_col, value_col)
+    values, starts, sizes = stats["sorted_values"], stats["starts"], stats["count"]
+    q1, q3 = stats["q1"], stats["q3"]
+    iqr = q3 - q1
+
+    rng = np.random.default_rng(seed)
+    # Anggaran titik sampel berlaku total, bukan per kelompok
+    per_group = sample_points // max(len(sizes), 1)
+    lowerfence, upperfence = [], []
+    out_x, out_y, sample_x, sample_y = [], [], [], []
+    for k, label in enumerate(stats["groups"]):
+        seg = values[starts[k]:starts[k] + sizes[k]]
+        lo_lim, hi_lim = q1[k] - 1.5 * iqr[k], q3[k] + 1.5 * iqr[k]
+        a = np.searchsorted(seg, lo_lim, side="left")
+        b = np.searchsorted(seg, hi_lim, side="right")
+        lowerfence.append(seg[a])
+        upperfence.append(seg[b - 1])
+        outliers = np.concatenate([seg[:a], seg[b:]])
+        if len(outliers) > BOX_MAX_OUTLIERS:
+            outliers = rng.choice(outliers, BOX_MAX_OUTLIERS, replace=False)
+        out_x += [label] * len(outliers)
+        out_y += outliers.tolist()
+        inliers = seg[a:b]
+        take = inliers if len(inliers) <= per_group else rng.choice(inliers, per_group, replace=False)
+        sample_x += [label] * len(take)
+        sample_y += take.tolist()
+
+    return {
+        "groups": list(stats["groups"]),
+        "n": sizes.tolist(),
+        "q1": q1.tolist(),
+        "median": stats["median"].tolist(),
+        "q3": q3.tolist(),
+        "lowerfence": lowerfence,
+        "upperfence": upperfence,
+        "outliers": (out_x, out_y),
+        "sample": (sample_x, sample_y),
+    }
+
+def box_figure(summary: dict, x_title: str, y_title: str, title: str) -> go.Figure:
+    """Box plot from precomputed stats plus the capped jitter sample/outliers."""
+    fig = go.Figure()
+    fig.add_trace(go.Box(
+        x=summary["groups"], q1=summary["q1"], median=summary["median"], q3=summary["q3"],
+        lowerfence=summary["lowerfence"], upperfence=summary["upperfence"],
+        name=y_title, boxpoints=False, showlegend=False,
+    ))
+    sample_x, sample_y = summary["sample"]
+    if sample_x:
+        # Trace box transparan hanya untuk jitter titik sampel
+        fig.add_trace(go.Box(
+            x=sample_x, y=sample_y, boxpoints="all", jitter=0.5, pointpos=0,
+            line=dict(color="rgba(0,0,0,0)"), fillcolor="rgba(0,0,0,0)",
+            marker=dict(size=3, opacity=0.4), hoveron="points", name="sampel", showlegend=False,
+        ))
+    out_x, out_y = summary["outliers"]
+    if out_x:
+        fig.add_trace(go.Scatter(
+            x=out_x, y=out_y, mode="markers", name="outlier",
+            marker=dict(symbol="circle-open", size=6), showlegend=False,
+        ))
+    fig.update_layout(title=title, boxmode="overlay", xaxis_title=x_title, yaxis_title=y_title)
+    return fig
@@ -1,7 +1,10 @@
 # app.py
 import streamlit as st
 import plotly.express as px
-from utils import load_data, init_filters, apply_filters
+from utils import load_data, init_filters, apply_filters, cached_aggregate
+from agg_utils import rollup_kpis, compute_insights
+from geo_utils import (GEOJSON_URL, FEATURE_ID_KEY, available_levels,
+                       load_province_geojson, subset_features)
 
 # -------------------------------------------------
 # Helper functions (presentation only)
@@ -20,27 +23,30 @@ df = load_data()
 # Global filters (render once and stored in session_state)
 init_filters(df)
 df_filtered = apply_filters(df)
+# KPI & insight ringkas dijawab dari kubus agregat (tanpa memindai baris)
+kpi = rollup_kpis(df)
 
 st.title("📊 Dashboard Tracer Alumni UNSIKA — Overview")
 st.markdown("Gunakan filter di sidebar untuk menyaring data secara global (berlaku untuk semua halaman).")
 
 # KPI cards
 col1, col2, col3, col4 = st.columns([1.2,1.2,1.2,1.2])
+kpi_mean = {col: m["mean"] for col, m in kpi["measures"].items()}
 with col1:
-    st.metric("Jumlah Alumni (filter)", value=f"{len(df_filtered):,}")
+    st.metric("Jumlah Alumni (filter)", value=f"{kpi['count']:,}")
 with col2:
-    if "Gaji" in df_filtered.columns and not df_filtered.empty:
-        st.metric("Rata-rata Gaji", value=_fmt_currency(float(df_filtered['Gaji'].mean())))
+    if kpi_mean.get("Gaji") is not None:
+        st.metric("Rata-rata Gaji", value=_fmt_currency(kpi_mean["Gaji"]))
     else:
         st.metric("Rata-rata Gaji", value="-")
 with col3:
-    if "IPK" in df_filtered.columns and not df_filtered.empty:
-        st.metric("Rata-rata IPK", value=f"{df_filtered['IPK'].mean():.2f}")
+    if kpi_mean.get("IPK") is not None:
+        st.metric("Rata-rata IPK", value=f"{kpi_mean['IPK']:.2f}")
     else:
         st.metric("Rata-rata IPK", value="-")
 with col4:
-    if "Masa Tunggu Kerja" in df_filtered.columns and not df_filtered.empty:
-        st.metric("Rata-rata Masa Tunggu (bln)", value=f"{df_filtered['Masa Tunggu Kerja'].mean():.1f}")
+    if kpi_mean.get("Masa Tunggu Kerja") is not None:
+        st.metric("Rata-rata Masa Tunggu (bln)", value=f"{kpi_mean['Masa Tunggu Kerja']:.1f}")
     else:
         st.metric("Rata-rata Masa Tunggu (bln)", value="-")
 
@@ -54,40 +60,33 @@ else:
 
 # Peta Choropleth sederhana per Provinsi (butuh nama provinsi sesuai geojson)
 st.subheader("Sebaran Alumni per Provinsi")
-if not df_filtered.empty and "Lokasi Geografis" in df_filtered.columns:
-    prov_df = df_filtered["Lokasi Geografis"].value_counts().reset_index()
-    prov_df.columns = ["Provinsi", "Jumlah"]
-
-    # Normalisasi teks (hapus spasi, kapitalisasi awal tiap kata)
-    prov_df["Provinsi"] = prov_df["Provinsi"].str.strip().str.title()
-
-    # Mapping manual untuk selisih nama
-    mapping_prov = {
-        "Dki Jakarta": "DKI Jakarta",
-        "Jakarta": "DKI Jakarta",
-        "Jawa barat": "Jawa Barat",
-        "Jawa timur": "Jawa Timur",
-        "Jawa tengah": "Jawa Tengah",
-        "Yogyakarta": "DI Yogyakarta",
-        "Daerah Istimewa Yogyakarta": "DI Yogyakarta",
-        "Aceh darussalam": "Aceh",
-        "Kepulauan riau": "Kepulauan Riau",
-        "Bangka belitung": "Kep. Bangka Belitung",
-        "Kepulauan Bangka Belitung": "Kep. Bangka Belitung",
-        "Papua barat": "Papua Barat",
-        "Papua selatan": "Papua Selatan",
-        "Papua tengah": "Papua Tengah",
-        "Papua pegunungan": "Papua Pegunungan"
-    }
-    prov_df["Provinsi"] = prov_df["Provinsi"].replace(mapping_prov)
-
-    geojson_url = "https://raw.githubusercontent.com/superpikar/indonesia-geojson/master/indonesia-province.json"
+if not df_filtered.empty and "Provinsi" in kpi["counts"]:
+    # Provinsi sudah di-resolve saat ingest (gazetteer kota/alias → provinsi)
+    prov_counts = kpi["counts"]["Provinsi"]
+    prov_df = prov_counts[prov_counts > 0].rename_axis("Provinsi").reset_index()
+    unresolved = df.attrs.get("unresolved_locations") or {}
+    if unresolved:
+        st.caption("Lokasi tidak terpetakan ke provinsi: " +
+                   ", ".join(f"{name} ({n})" for name, n in unresolved.items()))
+
+    geo_levels = available_levels()
+    geojson = None
+    if geo_levels:
+        # Pilihan detail hanya berarti bila geometri lokal tersedia
+        geo_level = st.radio("Detail peta", geo_levels, horizontal=True) if len(geo_levels) > 1 else geo_levels[0]
+        geojson = load_province_geojson(geo_level)
+    if geojson is None:
+        # Geometri lokal belum dibundel → fallback ke unduhan online
+        st.caption("Geometri lokal belum tersedia (jalankan `python geo_utils.py`); memakai GeoJSON online.")
+        geojson = GEOJSON_URL
+    else:
+        geojson = subset_features(geojson, prov_df["Provinsi"])
     try:
         fig_map = px.choropleth(
             prov_df,
-            geojson=geojson_url,
+            geojson=geojson,
             locations="Provinsi",
-            featureidkey="properties.Propinsi",
+            featureidkey=FEATURE_ID_KEY,
             color="Jumlah",
             color_continuous_scale="Viridis",
             title="Sebaran Alumni per Provinsi"
@@ -106,19 +105,20 @@ st.subheader("📌 Insight Otomatis (ringkas)")
 if not df_filtered.empty:
     lines = []
     # avg salary
-    if "Gaji" in df_filtered.columns:
-        avg_sal = df_filtered["Gaji"].mean()
-        overall_avg = df["Gaji"].mean() if "Gaji" in df.columns else None
+    if kpi_mean.get("Gaji") is not None:
+        avg_sal = kpi_mean["Gaji"]
+        overall_avg = kpi["overall"]["Gaji"]["mean"]
         delta = f"{(avg_sal/overall_avg -1)*100:.1f}%" if overall_avg else ""
         lines.append(f"- Rata-rata gaji pada filter: **Rp {avg_sal:,.0f}** ({delta} vs keseluruhan).")
     # top industry
-    if "Bidang Industri" in df_filtered.columns:
-        top_ind = df_filtered["Bidang Industri"].value_counts().idxmax()
+    if "Bidang Industri" in kpi["top"]:
+        top_ind, _ = kpi["top"]["Bidang Industri"]
         lines.append(f"- Bidang industri dominan: **{top_ind}**.")
     # top provinsi
-    if "Lokasi Geografis" in df_filtered.columns:
-        top_prov = df_filtered["Lokasi Geografis"].value_counts().idxmax()
-        lines.append(f"- Provinsi terbanyak: **{top_prov}** ({df_filtered['Lokasi Geografis'].value_counts().max()} alumni).")
+    prov_key = "Provinsi" if "Provinsi" in kpi["top"] else "Lokasi Geografis"
+    if prov_key in kpi["top"]:
+        top_prov, top_prov_n = kpi["top"][prov_key]
+        lines.append(f"- Provinsi terbanyak: **{top_prov}** ({top_prov_n} alumni).")
     st.markdown("\n".join(lines))
 else:
     st.warning("Filter menghasilkan dataset kosong — tidak ada insight yang dapat ditampilkan.")
@@ -128,24 +128,16 @@ else:
 # ===================================================
 st.subheader("📊 Ringkasan EDA & Korelasi")
 
-# Variabel numerik
-num_cols = df_filtered.select_dtypes(include=['number']).columns.tolist()
-cat_cols = df_filtered.select_dtypes(exclude=['number']).columns.tolist()
+insights = cached_aggregate(df, "overview_insights", lambda: compute_insights(df_filtered))
 
 # Insight distribusi numerik
-if num_cols:
+if not insights.numeric.empty:
     st.markdown("**Insight Numerik:**")
-    for col in num_cols:
+    for col, row in insights.numeric.iterrows():
         if col.lower() == "ipk":  # khusus IPK pakai float 2 desimal
-            mean_val = round(df_filtered[col].mean(), 2)
-            median_val = round(df_filtered[col].median(), 2)
-            min_val = round(df_filtered[col].min(), 2)
-            max_val = round(df_filtered[col].max(), 2)
+            mean_val, median_val, min_val, max_val = (round(float(row[k]), 2) for k in ("mean", "median", "min", "max"))
         else:  # default integer
-            mean_val = int(round(df_filtered[col].mean()))
-            median_val = int(round(df_filtered[col].median()))
-            min_val = int(round(df_filtered[col].min()))
-            max_val = int(round(df_filtered[col].max()))
+            mean_val, median_val, min_val, max_val = (int(round(row[k])) for k in ("mean", "median", "min", "max"))
 
         if median_val != 0 and abs(mean_val - median_val) / (median_val+1e-9) > 0.2:
             skew_info = "→ Distribusi miring (mean ≠ median)."
@@ -156,34 +148,21 @@ if num_cols:
 
 
 # Insight kategorikal
-if cat_cols:
+if insights.categorical:
     st.markdown("**Insight Kategorikal:**")
-    for col in cat_cols[:3]:  # batasi agar ringkas
-        freq = df_filtered[col].value_counts()
-        if not freq.empty:
-            top_cat, top_val = freq.index[0], freq.iloc[0]
-            ratio = top_val / freq.sum()
-            if ratio > 0.6:
-                warn = "⚠️ kategori ini sangat dominan (>60%)."
-            else:
-                warn = ""
-            st.write(f"- {col}: kategori terbanyak = **{top_cat}** ({top_val} data). {warn}")
+    for col, top_cat, top_val, ratio in insights.categorical:
+        if ratio > 0.6:
+            warn = "⚠️ kategori ini sangat dominan (>60%)."
+        else:
+            warn = ""
+        st.write(f"- {col}: kategori terbanyak = **{top_cat}** ({top_val} data). {warn}")
 
 # Insight korelasi
-if len(num_cols) >= 2:
-    corr = df_filtered[num_cols].corr()
-    strong_corr = []
-    for i in corr.columns:
-        for j in corr.columns:
-            if i != j and abs(corr.loc[i, j]) >= 0.5:
-                strong_corr.append((i, j, corr.loc[i, j]))
-    if strong_corr:
+if len(insights.numeric) >= 2:
+    if insights.strong_corr:
         st.markdown("**Insight Korelasi (|r| ≥ 0.5):**")
-        seen = set()
-        for (a, b, r) in strong_corr:
-            if (b, a) not in seen:
-                arah = "positif" if r > 0 else "negatif"
-                st.write(f"- {a} & {b}: r = {r:.2f} ({arah})")
-            seen.add((a, b))
+        for (a, b, r) in insights.strong_corr:
+            arah = "positif" if r > 0 else "negatif"
+            st.write(f"- {a} & {b}: r = {r:.2f} ({arah})")
     else:
         st.info("Tidak ada korelasi kuat antar variabel numerik (|r| ≥ 0.5).")
@@ -0,0 +1,23 @@
+# cache_utils.py
+import pandas as pd
+import streamlit as st
+
+# -------------------------------------------------
+# Resource per versi dataset (indeks filter, kubus KPI, indeks teks)
+# -------------------------------------------------
+# Versi aktif + versi sebelumnya untuk tiap jenis resource
+PER_VERSION_MAX_ENTRIES = 8
+
+@st.cache_resource(max_entries=PER_VERSION_MAX_ENTRIES)
+def _cached_resource(_df: pd.DataFrame, _builder, name: str, version: str, params: tuple):
+    return _builder(_df, *params)
+
+def per_version_resource(df: pd.DataFrame, name: str, builder, *params):
+    """builder(df, *params), built once per (name, dataset version, params) and shared across sessions.
+
+    Frames without a dataset_version are built on every call.
+    """
+    version = df.attrs.get("dataset_version")
+    if version is None:
+        return builder(df, *params)
+    return _cached_resource(df, builder, name, version, params)
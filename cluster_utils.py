@@ -0,0 +1,259 @@
+# cluster_utils.py
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+from agg_utils import group_codes
+from pool_utils import pool_map
+from utils import cached_aggregate, filter_key
+
+# -------------------------------------------------
+# K-Means + registry model (scaler, centroid, label, inertia)
+# -------------------------------------------------
+KMEANS_SEED = 42
+KMEANS_N_INIT = 10
+# Jumlah model yang disimpan registry (LRU); label disimpan int8 per baris
+REGISTRY_MAX_MODELS = 64
+# Sampel baris untuk menambah centroid saat warm start dari k yang lebih kecil
+WARM_START_SAMPLE = 10_000
+# Di atas ambang ini K-Means di-fit per minibatch (MiniBatchKMeans), lalu
+# semua baris di-assign sekali jalan; kualitasnya dibandingkan dengan K-Means
+# penuh pada sampel acak berukuran QUALITY_SAMPLE
+MINIBATCH_THRESHOLD_ROWS = 50_000
+MINIBATCH_SIZE = 4096
+MINIBATCH_N_INIT = 3
+QUALITY_SAMPLE = 10_000
+# Sweep pemilihan k: tiap k di-fit paralel, silhouette dihitung pada sampel
+# terstratifikasi (biaya kuadratik tetap terbatas)
+SWEEP_K = list(range(2, 9))
+SILHOUETTE_SAMPLE = 2_000
+SWEEP_STRATA = ["Konsentrasi", "Tahun Angkatan"]
+
+def cluster_matrix(d: pd.DataFrame, cols: list) -> np.ndarray:
+    return d[cols].to_numpy(dtype="float64", na_value=np.nan)
+
+def _adapt_centers(centers: np.ndarray, sizes: np.ndarray, k: int, Z: np.ndarray) -> np.ndarray:
+    """Turn a cached solution (scaled centroids) into k initial centroids.
+
+    Extra centroids are dropped smallest cluster first; missing ones are added
+    greedily at the sample point farthest from the current centroids.
+    """
+    if len(centers) >= k:
+        keep = np.sort(np.argsort(-sizes, kind="stable")[:k])
+        return centers[keep]
+    if len(Z) > WARM_START_SAMPLE:
+        rng = np.random.default_rng(KMEANS_SEED)
+        Z = Z[rng.choice(len(Z), WARM_START_SAMPLE, replace=False)]
+    out = list(centers)
+    dist = ((Z[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+    while len(out) < k:
+        new = Z[int(np.argmax(dist))]
+        out.append(new)
+        dist = np.minimum(dist, ((Z - new) ** 2).sum(axis=1))
+    return np.asarray(out)
+
+def _sample(X: np.ndarray, n: int) -> np.ndarray:
+    if len(X) <= n:
+        return X
+    rng = np.random.default_rng(KMEANS_SEED)
+    return X[np.sort(rng.choice(len(X), n, replace=False))]
+
+def _inertia(Z: np.ndarray, centers: np.ndarray) -> float:
+    d2 = (Z ** 2).sum(axis=1)[:, None] - 2 * Z @ centers.T + (centers ** 2).sum(axis=1)[None, :]
+    return float(np.maximum(d2.min(axis=1), 0).sum())
+
+def _quality_loss(Z: np.ndarray, k: int, centers: np.ndarray) -> float:
+    """Relative inertia increase of `centers` vs full K-Means, both on the same sample."""
+    S = _sample(Z, QUALITY_SAMPLE)
+    full = KMeans(n_clusters=k, random_state=KMEANS_SEED, n_init=KMEANS_N_INIT).fit(S)
+    return _inertia(S, centers) / full.inertia_ - 1 if full.inertia_ > 0 else 0.0
+
+def fit_kmeans(X: np.ndarray, k: int, warm: dict = None) -> dict:
+    """Standardize X and fit K-Means with k clusters.
+
+    Without `warm`, K-Means runs n_init=10 restarts as before. With a cached
+    model from a nearby (k, filter) state, its centroids (stored in original
+    units, so they carry over across scalers) seed a single run instead.
+
+    Above MINIBATCH_THRESHOLD_ROWS rows MiniBatchKMeans is used instead; its
+    quality loss vs full K-Means on a sample is reported as `quality_loss`.
+    """
+    scaler = StandardScaler()
+    Z = scaler.fit_transform(X)
+    init, n_init = "k-means++", KMEANS_N_INIT
+    if warm is not None:
+        init, n_init = _adapt_centers(scaler.transform(warm["centers"]), warm["sizes"], k, Z), 1
+    minibatch = len(Z) > MINIBATCH_THRESHOLD_ROWS
+    if minibatch:
+        km = MiniBatchKMeans(n_clusters=k, init=init, batch_size=MINIBATCH_SIZE,
+                             n_init=min(n_init, MINIBATCH_N_INIT), random_state=KMEANS_SEED)
+    else:
+        km = KMeans(n_clusters=k, init=init, n_init=n_init, random_state=KMEANS_SEED)
+    # fit() juga meng-assign seluruh baris ke centroid akhir (labels_, inertia_)
+    km.fit(Z)
+    labels = km.labels_
+    return {
+        "k": k,
+        "scaler": scaler,
+        "centers": scaler.inverse_transform(km.cluster_centers_),
+        "labels": labels.astype(np.int8),
+        "sizes": np.bincount(labels, minlength=k),
+        "inertia": float(km.inertia_),
+        "n_iter": int(km.n_iter_),
+        "warm_start": warm is not None,
+        "mode": "minibatch" if minibatch else "full",
+        "quality_loss": _quality_loss(Z, k, km.cluster_centers_) if minibatch else 0.0,
+    }
+
+class KMeansRegistry:
+    """Thread-safe LRU store of fitted models keyed by (version, filter key, cols, k)."""
+
+    def __init__(self, max_models: int = REGISTRY_MAX_MODELS):
+        self.max_models = max_models
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+            return model
+
+    def put(self, key, model: dict) -> None:
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+
+    def nearest(self, key):
+        """Closest cached model for the same data and columns.
+
+        Same filter state wins over a closer k; ties go to the larger k.
+        """
+        version, fkey, cols, k = key
+        with self._lock:
+            candidates = [
+                (other_f != fkey, abs(other_k - k), -other_k, model)
+                for (other_v, other_f, other_c, other_k), model in self._models.items()
+                if other_v == version and other_c == cols and (other_f, other_k) != (fkey, k)
+            ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda c: c[:3])[3]
+
+@st.cache_resource
+def get_kmeans_registry() -> KMeansRegistry:
+    return KMeansRegistry()
+
+def cluster_model(df: pd.DataFrame, d: pd.DataFrame, cols: list, k: int, filters: dict = None) -> dict:
+    """Fitted K-Means for d (df filtered, NaN rows in cols dropped), via the registry.
+
+    Cached models are shared objects: callers must not mutate them.
+    """
+    X = cluster_matrix(d, cols)
+    version = df.attrs.get("dataset_version")
+    if version is None:
+        return fit_kmeans(X, k)
+    registry = get_kmeans_registry()
+    key = (version, filter_key(df, filters), tuple(cols), k)
+    model = registry.get(key)
+    if model is None or len(model["labels"]) != len(X):
+        model = fit_kmeans(X, k, warm=registry.nearest(key))
+        registry.put(key, model)
+    return model
+
+# -------------------------------------------------
+# Sweep k (elbow + silhouette sampel)
+# -------------------------------------------------
+def stratified_sample(strata: np.ndarray, n: int, seed: int = KMEANS_SEED) -> np.ndarray:
+    """Sorted positions of about n rows, allocated to strata in proportion to their size.
+
+    Each non-empty stratum gets at least one row, so the sample can exceed n by
+    at most the number of strata.
+    """
+    if len(strata) <= n:
+        return np.arange(len(strata))
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(len(strata)), strata))
+    _, starts, counts = np.unique(strata[order], return_index=True, return_counts=True)
+    quota = np.ceil(counts * (n / len(strata))).astype(np.int64)
+    rank = np.arange(len(order)) - np.repeat(starts, counts)
+    return np.sort(order[rank < np.repeat(quota, counts)])
+
+def _sweep_one(X: np.ndarray, k: int, sample: np.ndarray) -> dict:
+    model = fit_kmeans(X, k)
+    labels = model["labels"][sample]
+    sil = np.nan
+    if 1 < len(np.unique(labels)) < len(sample):
+        sil = float(silhouette_score(model["scaler"].transform(X[sample]), labels))
+    return {"model": model, "silhouette": sil}
+
+def kmeans_sweep(X: np.ndarray, sample: np.ndarray, ks: list = SWEEP_K) -> list:
+    """Fit K-Means for every k (on a process pool when available).
+
+    Silhouette is scored on the rows at positions `sample`. Returns one
+    {"model", "silhouette"} per k; k values above the row count are skipped.
+    """
+    ks = [k for k in ks if k <= len(X)]
+    calls = [(X, k, sample) for k in ks]
+    results = pool_map(_sweep_one, calls)
+    if results is None:
+        results = [_sweep_one(*args) for args in calls]
+    return results
+
+def _elbow_k(ks: np.ndarray, inertia: np.ndarray) -> int:
+    """k farthest below the straight line joining the first and last inertia."""
+    if len(ks) < 3:
+        return int(ks[0])
+    x = (ks - ks[0]) / (ks[-1] - ks[0])
+    y = (inertia - inertia[-1]) / max(inertia[0] - inertia[-1], 1e-12)
+    return int(ks[np.argmax((1 - x) - y)])
+
+def _sweep_strata(d: pd.DataFrame) -> np.ndarray:
+    strata = np.zeros(len(d), dtype=np.int64)
+    for col in SWEEP_STRATA:
+        if col in d.columns:
+            codes, labels = group_codes(d[col])
+            strata = strata * (len(labels) + 1) + (codes + 1)
+    return strata
+
+def cluster_sweep(df: pd.DataFrame, d: pd.DataFrame, cols: list, filters: dict = None) -> dict:
+    """k-selection table for d (inertia + sampled silhouette), cached per filter state.
+
+    Fitted models are also added to the registry, so picking a k from the
+    sweep afterwards needs no refit.
+    """
+    def compute():
+        X = cluster_matrix(d, cols)
+        sample = stratified_sample(_sweep_strata(d), SILHOUETTE_SAMPLE)
+        results = kmeans_sweep(X, sample)
+        table = pd.DataFrame({
+            "k": [r["model"]["k"] for r in results],
+            "Inertia": [r["model"]["inertia"] for r in results],
+            "Silhouette": [r["silhouette"] for r in results],
+        })
+        version = df.attrs.get("dataset_version")
+        if version is not None:
+            registry = get_kmeans_registry()
+            fkey = filter_key(df, filters)
+            for r in results:
+                key = (version, fkey, tuple(cols), r["model"]["k"])
+                if registry.get(key) is None:
+                    registry.put(key, r["model"])
+        recommended = None
+        if table["Silhouette"].notna().any():
+            recommended = int(table.loc[table["Silhouette"].idxmax(), "k"])
+        return {
+            "table": table,
+            "recommended": recommended,
+            "elbow": _elbow_k(table["k"].to_numpy(), table["Inertia"].to_numpy()) if len(table) else None,
+            "sample_size": len(sample),
+        }
+
+    return cached_aggregate(df, "kmeans_sweep", compute, tuple(cols), filters=filters)
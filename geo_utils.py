@@ -0,0 +1,322 @@
+# geo_utils.py
+import json
+import os
+import re
+import sys
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Geometri provinsi dibundel lokal agar peta tetap tampil tanpa akses internet.
+# Isi sekali dengan `python geo_utils.py` (butuh internet): sumber disimpan di
+# GEOJSON_PATH dan tiap tingkat detail yang sudah disederhanakan ditulis ke
+# data/ (GEOJSON_LEVEL_PATHS) untuk di-commit. GEOJSON_URL hanya cadangan.
+GEOJSON_PATH = os.path.join("data", "indonesia-province.json")
+GEOJSON_URL = "https://raw.githubusercontent.com/superpikar/indonesia-geojson/master/indonesia-province.json"
+FEATURE_ID_KEY = "properties.Propinsi"
+
+# Toleransi penyederhanaan (derajat) per tingkat detail peta
+SIMPLIFY_TOLERANCES = {
+    "Ringkas": 0.05,
+    "Detail": 0.01,
+}
+GEOJSON_LEVEL_PATHS = {
+    level: os.path.join("data", f"indonesia-province-{level.lower()}.json")
+    for level in SIMPLIFY_TOLERANCES
+}
+COORD_DECIMALS = 4
+GEO_CACHE_DIR = os.path.join(".snapshot_cache", "geo")
+
+# -------------------------------------------------
+# Gazetteer: alias provinsi & kota → provinsi
+# -------------------------------------------------
+# Nama kanonik mengikuti properti "Propinsi" pada GeoJSON
+PROVINCE_ALIASES = {
+    "Aceh": ["aceh darussalam", "nanggroe aceh darussalam", "nad", "di aceh"],
+    "Sumatera Utara": ["sumut", "sumatra utara"],
+    "Sumatera Barat": ["sumbar", "sumatra barat"],
+    "Riau": [],
+    "Kepulauan Riau": ["kepri", "kep riau"],
+    "Jambi": [],
+    "Sumatera Selatan": ["sumsel", "sumatra selatan"],
+    "Kep. Bangka Belitung": ["bangka belitung", "kepulauan bangka belitung", "babel"],
+    "Bengkulu": [],
+    "Lampung": [],
+    "DKI Jakarta": ["jakarta", "dki", "daerah khusus ibukota jakarta"],
+    "Jawa Barat": ["jabar"],
+    "Banten": [],
+    "Jawa Tengah": ["jateng"],
+    "DI Yogyakarta": ["yogyakarta", "diy", "daerah istimewa yogyakarta", "jogja", "jogjakarta"],
+    "Jawa Timur": ["jatim"],
+    "Bali": [],
+    "Nusa Tenggara Barat": ["ntb"],
+    "Nusa Tenggara Timur": ["ntt"],
+    "Kalimantan Barat": ["kalbar"],
+    "Kalimantan Tengah": ["kalteng"],
+    "Kalimantan Selatan": ["kalsel"],
+    "Kalimantan Timur": ["kaltim"],
+    "Kalimantan Utara": ["kaltara"],
+    "Sulawesi Utara": ["sulut"],
+    "Gorontalo": [],
+    "Sulawesi Tengah": ["sulteng"],
+    "Sulawesi Barat": ["sulbar"],
+    "Sulawesi Selatan": ["sulsel"],
+    "Sulawesi Tenggara": ["sultra"],
+    "Maluku": [],
+    "Maluku Utara": ["malut"],
+    "Papua": [],
+    "Papua Barat": [],
+    "Papua Barat Daya": [],
+    "Papua Selatan": [],
+    "Papua Tengah": [],
+    "Papua Pegunungan": [],
+}
+
+CITY_TO_PROVINCE = {
+    # Jawa & Banten
+    "Jakarta Pusat": "DKI Jakarta", "Jakarta Selatan": "DKI Jakarta", "Jakarta Barat": "DKI Jakarta",
+    "Jakarta Timur": "DKI Jakarta", "Jakarta Utara": "DKI Jakarta",
+    "Bandung": "Jawa Barat", "Karawang": "Jawa Barat", "Bekasi": "Jawa Barat", "Cikarang": "Jawa Barat",
+    "Bogor": "Jawa Barat", "Depok": "Jawa Barat", "Cirebon": "Jawa Barat", "Purwakarta": "Jawa Barat",
+    "Sukabumi": "Jawa Barat", "Tasikmalaya": "Jawa Barat", "Cimahi": "Jawa Barat", "Subang": "Jawa Barat",
+    "Tangerang": "Banten", "Tangerang Selatan": "Banten", "Serang": "Banten", "Cilegon": "Banten",
+    "Semarang": "Jawa Tengah", "Solo": "Jawa Tengah", "Surakarta": "Jawa Tengah", "Tegal": "Jawa Tengah",
+    "Pekalongan": "Jawa Tengah", "Magelang": "Jawa Tengah", "Purwokerto": "Jawa Tengah", "Kudus": "Jawa Tengah",
+    "Sleman": "DI Yogyakarta", "Bantul": "DI Yogyakarta",
+    "Surabaya": "Jawa Timur", "Malang": "Jawa Timur", "Sidoarjo": "Jawa Timur", "Gresik": "Jawa Timur",
+    "Kediri": "Jawa Timur", "Madiun": "Jawa Timur", "Pasuruan": "Jawa Timur", "Jember": "Jawa Timur",
+    # Sumatera
+    "Banda Aceh": "Aceh", "Lhokseumawe": "Aceh",
+    "Medan": "Sumatera Utara", "Binjai": "Sumatera Utara", "Pematangsiantar": "Sumatera Utara",
+    "Padang": "Sumatera Barat", "Bukittinggi": "Sumatera Barat",
+    "Pekanbaru": "Riau", "Dumai": "Riau",
+    "Batam": "Kepulauan Riau", "Tanjung Pinang": "Kepulauan Riau",
+    "Palembang": "Sumatera Selatan", "Pangkal Pinang": "Kep. Bangka Belitung",
+    "Bandar Lampung": "Lampung",
+    # Bali & Nusa Tenggara
+    "Denpasar": "Bali", "Mataram": "Nusa Tenggara Barat", "Kupang": "Nusa Tenggara Timur",
+    # Kalimantan
+    "Pontianak": "Kalimantan Barat", "Palangkaraya": "Kalimantan Tengah", "Palangka Raya": "Kalimantan Tengah",
+    "Banjarmasin": "Kalimantan Selatan", "Banjarbaru": "Kalimantan Selatan",
+    "Balikpapan": "Kalimantan Timur", "Samarinda": "Kalimantan Timur", "Bontang": "Kalimantan Timur",
+    "Tarakan": "Kalimantan Utara",
+    # Sulawesi, Maluku, Papua
+    "Makassar": "Sulawesi Selatan", "Manado": "Sulawesi Utara", "Bitung": "Sulawesi Utara",
+    "Palu": "Sulawesi Tengah", "Kendari": "Sulawesi Tenggara", "Mamuju": "Sulawesi Barat",
+    "Ambon": "Maluku", "Ternate": "Maluku Utara", "Sofifi": "Maluku Utara",
+    "Jayapura": "Papua", "Manokwari": "Papua Barat", "Sorong": "Papua Barat Daya",
+    "Merauke": "Papua Selatan", "Nabire": "Papua Tengah", "Timika": "Papua Tengah", "Wamena": "Papua Pegunungan",
+}
+
+def _gazetteer_key(name) -> str:
+    """Lowercase, punctuation-free lookup key ("Kep. Riau" → "kep riau")."""
+    return " ".join(re.sub(r"[^\w\s]", " ", str(name).lower()).split())
+
+def _build_gazetteer():
+    province_lookup = {}
+    for canonical, aliases in PROVINCE_ALIASES.items():
+        for alias in [canonical] + aliases:
+            province_lookup[_gazetteer_key(alias)] = canonical
+    city_lookup = {_gazetteer_key(city): prov for city, prov in CITY_TO_PROVINCE.items()}
+    return province_lookup, city_lookup
+
+# Dikompilasi sekali saat modul diimpor
+_PROVINCE_LOOKUP, _CITY_LOOKUP = _build_gazetteer()
+
+def canonical_location(name):
+    """Province aliases → canonical province name; anything else unchanged."""
+    return _PROVINCE_LOOKUP.get(_gazetteer_key(name), name)
+
+def resolve_province(name):
+    """Province for a province alias or a known city, else None."""
+    key = _gazetteer_key(name)
+    return _PROVINCE_LOOKUP.get(key) or _CITY_LOOKUP.get(key)
+
+def map_categories(s: pd.Series, func) -> pd.Categorical:
+    """Apply func to each distinct value only, then broadcast back by code."""
+    codes, uniques = pd.factorize(s)
+    mapped = pd.Series([func(u) for u in uniques], dtype="object")
+    categories = sorted(mapped.dropna().unique())
+    lookup = {c: i for i, c in enumerate(categories)}
+    new_codes = np.array([lookup.get(m, -1) if m is not None else -1 for m in mapped] + [-1], dtype=np.int32)
+    return pd.Categorical.from_codes(new_codes[codes], categories=categories)
+
+def annotate_provinces(df: pd.DataFrame, column: str = "Lokasi Geografis") -> pd.DataFrame:
+    """Add a resolved "Provinsi" column and record unresolved locations.
+
+    Resolution runs over distinct location values only. Values that are
+    neither a province alias nor a known city are listed (with row counts)
+    in ``df.attrs["unresolved_locations"]``.
+    """
+    if column not in df.columns:
+        return df
+    df["Provinsi"] = map_categories(df[column], resolve_province)
+    missing = df["Provinsi"].isna() & df[column].notna()
+    counts = df.loc[missing, column].astype(str).value_counts()
+    df.attrs["unresolved_locations"] = {str(k): int(v) for k, v in counts.items() if v > 0}
+    return df
+
+def _dp_keep(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker on an open polyline; returns a keep-mask."""
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        seg = points[b] - points[a]
+        rel = points[a + 1:b] - points[a]
+        seg_len = np.hypot(*seg)
+        if seg_len == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / seg_len
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            keep[a + 1 + i] = True
+            stack.append((a, a + 1 + i))
+            stack.append((a + 1 + i, b))
+    return keep
+
+def _iter_rings(geometry: dict):
+    if geometry["type"] == "Polygon":
+        yield from geometry["coordinates"]
+    elif geometry["type"] == "MultiPolygon":
+        for polygon in geometry["coordinates"]:
+            yield from polygon
+
+def _vertex_key(pt) -> tuple:
+    return (round(pt[0], 6), round(pt[1], 6))
+
+def simplify_geojson(geojson: dict, tolerance: float) -> dict:
+    """Topology-aware simplification of a province FeatureCollection.
+
+    Vertices where the set of rings sharing a boundary changes are locked,
+    so a border shared by two provinces is simplified between the same
+    fixed endpoints on both sides and no gaps/overlaps appear. Rings that
+    collapse below a triangle are dropped (tiny islands at coarse levels).
+    """
+    owners = {}
+    ring_id = 0
+    for feature in geojson["features"]:
+        for ring in _iter_rings(feature["geometry"]):
+            for pt in ring:
+                owners.setdefault(_vertex_key(pt), set()).add(ring_id)
+            ring_id += 1
+
+    def simplify_ring(ring):
+        pts = np.asarray(ring, dtype=float)[:, :2]
+        if len(pts) < 4:
+            return None
+        sharing = [frozenset(owners[_vertex_key(p)]) for p in pts]
+        locked = np.zeros(len(pts), dtype=bool)
+        locked[0] = locked[-1] = True
+        for i in range(1, len(pts) - 1):
+            if sharing[i] != sharing[i - 1] or sharing[i] != sharing[i + 1]:
+                locked[i] = True
+        keep = locked.copy()
+        anchors = np.flatnonzero(locked)
+        for a, b in zip(anchors[:-1], anchors[1:]):
+            if b - a >= 2:
+                keep[a:b + 1] |= _dp_keep(pts[a:b + 1], tolerance)
+        out = np.round(pts[keep], COORD_DECIMALS)
+        if len(out) < 4:
+            return None
+        return out.tolist()
+
+    features = []
+    for feature in geojson["features"]:
+        geom = feature["geometry"]
+        polygons = [geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"]
+        new_polygons = []
+        for polygon in polygons:
+            outer = simplify_ring(polygon[0])
+            if outer is None:
+                continue
+            holes = [h for h in (simplify_ring(r) for r in polygon[1:]) if h is not None]
+            new_polygons.append([outer] + holes)
+        if not new_polygons:
+            continue
+        features.append({
+            "type": "Feature",
+            "properties": feature.get("properties", {}),
+            "geometry": {"type": "MultiPolygon", "coordinates": new_polygons},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+def _read_json(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def available_levels() -> list:
+    """Detail levels that can be drawn from local geometry (empty = none bundled)."""
+    if os.path.exists(GEOJSON_PATH):
+        return list(SIMPLIFY_TOLERANCES)
+    return [level for level, path in GEOJSON_LEVEL_PATHS.items() if os.path.exists(path)]
+
+@st.cache_resource
+def load_province_geojson(level: str = "Ringkas"):
+    """Simplified province geometry for a detail level, or None if not bundled.
+
+    A precomputed level in data/ is used as is. Otherwise the source file is
+    simplified and the output is written next to the snapshot cache so a
+    restart does not need to simplify again.
+    """
+    bundled = GEOJSON_LEVEL_PATHS[level]
+    if os.path.exists(bundled):
+        try:
+            return _read_json(bundled)
+        except Exception:
+            pass
+    if not os.path.exists(GEOJSON_PATH):
+        return None
+    tolerance = SIMPLIFY_TOLERANCES[level]
+    stat = os.stat(GEOJSON_PATH)
+    cache_path = os.path.join(GEO_CACHE_DIR, f"province-{stat.st_size}-{stat.st_mtime_ns}-{tolerance}.json")
+    if os.path.exists(cache_path):
+        try:
+            return _read_json(cache_path)
+        except Exception:
+            pass
+    simplified = simplify_geojson(_read_json(GEOJSON_PATH), tolerance)
+    try:
+        os.makedirs(GEO_CACHE_DIR, exist_ok=True)
+        with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(simplified, f, separators=(",", ":"))
+        os.replace(cache_path + ".tmp", cache_path)
+    except OSError:
+        pass
+    return simplified
+
+def subset_features(geojson: dict, names) -> dict:
+    """Keep only the provinces that are drawn, to shrink the figure payload."""
+    wanted = set(names)
+    prop = FEATURE_ID_KEY.split(".", 1)[1]
+    return {
+        "type": "FeatureCollection",
+        "features": [f for f in geojson["features"] if f["properties"].get(prop) in wanted],
+    }
+
+def fetch_geojson(url: str = GEOJSON_URL, path: str = GEOJSON_PATH) -> None:
+    """One-time download of the source geometry into the bundle location."""
+    from urllib.request import urlopen
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with urlopen(url, timeout=60) as resp:
+        data = json.loads(resp.read().decode("utf-8"))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+def write_bundled_levels(path: str = GEOJSON_PATH) -> None:
+    """Precompute every detail level into data/ so the app never simplifies at runtime."""
+    source = _read_json(path)
+    for level, tolerance in SIMPLIFY_TOLERANCES.items():
+        with open(GEOJSON_LEVEL_PATHS[level], "w", encoding="utf-8") as f:
+            json.dump(simplify_geojson(source, tolerance), f, separators=(",", ":"))
+
+if __name__ == "__main__":
+    fetch_geojson(*sys.argv[1:2])
+    write_bundled_levels()
+    print(f"✅ Geometri provinsi disimpan di '{GEOJSON_PATH}' + {', '.join(GEOJSON_LEVEL_PATHS.values())}")
@@ -1,12 +1,32 @@
 # pages/1_Karir_Gaji.py
 import streamlit as st
 import plotly.express as px
-from utils import load_data, init_filters, apply_filters
+from utils import load_data, init_filters, apply_filters, cached_aggregate
+from agg_utils import grouped_stats, group_means, box_summary, box_figure, top_n_counts
+
+def _karir_aggregates(d):
+    """Per-page aggregate bundle (shared across sessions with the same filter).
+
+    Means, quartiles and box summaries per group come from one fused
+    grouped_stats pass; top-10 tables use a partial sort.
+    """
+    out = {}
+    for key, group_col in [("industri", "Bidang Industri"), ("lokasi", "Lokasi Geografis")]:
+        if {group_col, "Gaji"}.issubset(d.columns):
+            stats = grouped_stats(d, group_col, "Gaji")
+            out[f"avg_{key}"] = group_means(stats, group_col, "Gaji")
+            out[f"box_{key}"] = box_summary(d, group_col, "Gaji", stats=stats)
+    if "Perusahaan" in d.columns:
+        out["top_perusahaan"] = top_n_counts(d["Perusahaan"], "Perusahaan")
+    if "Posisi/Jabatan" in d.columns:
+        out["top_posisi"] = top_n_counts(d["Posisi/Jabatan"], "Posisi/Jabatan")
+    return out
 
 st.set_page_config(layout="wide")
 df = load_data()
 init_filters(df)
 df_filtered = apply_filters(df)
+agg = cached_aggregate(df, "karir_gaji", lambda: _karir_aggregates(df_filtered))
 
 st.title("💼 Karir & Gaji")
 
@@ -19,7 +39,7 @@ else:
     # ========================
     st.subheader("Distribusi Gaji per Bidang Industri (Boxplot)")
     if {"Bidang Industri","Gaji"}.issubset(df_filtered.columns):
-        fig1 = px.box(df_filtered, x="Bidang Industri", y="Gaji", points="all", title="Gaji per Industri")
+        fig1 = box_figure(agg["box_industri"], "Bidang Industri", "Gaji", "Gaji per Industri")
         st.plotly_chart(fig1, use_container_width=True)
 
     # ========================
@@ -27,8 +47,7 @@ else:
     # ========================
     st.subheader("Rata-rata Gaji per Bidang Industri (Bar Plot)")
     if {"Bidang Industri","Gaji"}.issubset(df_filtered.columns):
-        avg_industri = df_filtered.groupby("Bidang Industri")["Gaji"].mean().reset_index()
-        fig_bar_ind = px.bar(avg_industri, x="Bidang Industri", y="Gaji",
+        fig_bar_ind = px.bar(agg["avg_industri"], x="Bidang Industri", y="Gaji",
                              title="Rata-rata Gaji per Industri", text_auto=".2s")
         st.plotly_chart(fig_bar_ind, use_container_width=True)
 
@@ -37,7 +56,7 @@ else:
     # ========================
     st.subheader("Distribusi Gaji per Lokasi Geografis (Boxplot)")
     if {"Lokasi Geografis","Gaji"}.issubset(df_filtered.columns):
-        fig2 = px.box(df_filtered, x="Lokasi Geografis", y="Gaji", points="all", title="Gaji per Lokasi")
+        fig2 = box_figure(agg["box_lokasi"], "Lokasi Geografis", "Gaji", "Gaji per Lokasi")
         st.plotly_chart(fig2, use_container_width=True)
 
     # ========================
@@ -45,8 +64,7 @@ else:
     # ========================
     st.subheader("Rata-rata Gaji per Lokasi Geografis (Bar Plot)")
     if {"Lokasi Geografis","Gaji"}.issubset(df_filtered.columns):
-        avg_lokasi = df_filtered.groupby("Lokasi Geografis")["Gaji"].mean().reset_index()
-        fig_bar_loc = px.bar(avg_lokasi, x="Lokasi Geografis", y="Gaji",
+        fig_bar_loc = px.bar(agg["avg_lokasi"], x="Lokasi Geografis", y="Gaji",
                              title="Rata-rata Gaji per Lokasi", text_auto=".2s")
         st.plotly_chart(fig_bar_loc, use_container_width=True)
 
@@ -55,21 +73,11 @@ else:
     # ========================
     st.subheader("Top 10 Perusahaan (filter)")
     if "Perusahaan" in df_filtered.columns:
-        st.table(
-            df_filtered["Perusahaan"].value_counts()
-            .head(10)
-            .rename_axis("Perusahaan")
-            .reset_index(name="Jumlah")
-        )
+        st.table(agg["top_perusahaan"])
 
     # ========================
     # Top 10 Posisi/Jabatan
     # ========================
     st.subheader("Top 10 Posisi/Jabatan (filter)")
     if "Posisi/Jabatan" in df_filtered.columns:
-        st.table(
-            df_filtered["Posisi/Jabatan"].value_counts()
-            .head(10)
-            .rename_axis("Posisi/Jabatan")
-            .reset_index(name="Jumlah")
-        )
+        st.table(agg["top_posisi"])
@@ -1,9 +1,45 @@
 # pages/2_Statistik.py
 import streamlit as st
 import plotly.express as px
+import plotly.graph_objects as go
 import pandas as pd
-from utils import load_data, init_filters, apply_filters
-from scipy.stats import chi2_contingency, f_oneway
+import numpy as np
+from utils import load_data, init_filters, apply_filters, cached_aggregate, filter_rows
+from agg_utils import group_codes, cube_group_moments
+from stats_utils import (ols_fit, grouped_ols, association_matrix, association_heatmap_frame,
+                         group_moments, anova_from_moments, rank_order, kruskal_from_order,
+                         RESAMPLE_BUDGETS, RESAMPLE_SEED, default_resamples, bootstrap_group_means,
+                         bootstrap_median, bootstrap_corr, permutation_anova)
+from scipy.stats import chi2_contingency
+
+ANOVA_FACTORS = {"Lokasi": "Lokasi Geografis", "Bidang Industri": "Bidang Industri", "Konsentrasi": "Konsentrasi"}
+
+def _chi2_konsentrasi_industri(d):
+    ct = pd.crosstab(d["Konsentrasi"], d["Bidang Industri"])
+    # Buang kategori yang tidak muncul pada filter aktif (baris/kolom nol)
+    ct = ct.loc[ct.sum(axis=1) > 0, ct.sum(axis=0) > 0]
+    try:
+        chi2, p, dof, expected = chi2_contingency(ct)
+    except Exception as e:
+        return ct, None, str(e)
+    return ct, (chi2, p, dof), None
+
+def _one_way_tests(df, d, factor, value="Gaji"):
+    # ANOVA: kolom filter digabung dari sel kubus, kolom lain dari bincount baris
+    moments = cube_group_moments(df, factor, value)
+    if moments is None:
+        moments = group_moments(d, factor, value)
+    anova = anova_from_moments(moments[1])
+    # Kruskal-Wallis: urutan global (sekali per versi data) disaring ke baris aktif
+    values = df[value].to_numpy(dtype="float64", na_value=np.nan)
+    order = cached_aggregate(df, "rank_order", lambda: rank_order(values), value, filters={})
+    rows = filter_rows(df)
+    if rows is not None:
+        keep = np.zeros(len(df), dtype=bool)
+        keep[rows] = True
+        order = order[keep[order]]
+    kruskal = kruskal_from_order(values, group_codes(df[factor])[0], order)
+    return {"anova": anova, "kruskal": kruskal}
 
 st.set_page_config(layout="wide")
 df = load_data()
@@ -18,42 +54,120 @@ else:
     # Regression-like scatter
     if {"IPK","Masa Tunggu Kerja"}.issubset(df_filtered.columns):
         st.subheader("IPK vs Masa Tunggu Kerja (scatter + trendline)")
-        fig = px.scatter(df_filtered, x="IPK", y="Masa Tunggu Kerja", trendline="ols",
+        fig = px.scatter(df_filtered, x="IPK", y="Masa Tunggu Kerja",
                          hover_data=["Tahun Angkatan","Bidang Industri","Konsentrasi"])
+        # Trendline OLS closed-form (tanpa statsmodels), di-cache per filter
+        fit = cached_aggregate(df, "ols_ipk_tunggu", lambda: ols_fit(df_filtered, "IPK", "Masa Tunggu Kerja"))
+        if fit is not None:
+            fig.add_trace(go.Scatter(x=fit["line_x"], y=fit["line_y"], mode="lines", name="OLS",
+                                     line=dict(color="firebrick")))
         st.plotly_chart(fig, use_container_width=True)
+        if fit is not None:
+            st.write(f"- Masa Tunggu = {fit['intercept']:.3f} + ({fit['slope']:.3f} × IPK), "
+                     f"R² = {fit['r2']:.3f}, p-value = {fit['p_value']:.5f}, n = {fit['n']}")
+            if "Konsentrasi" in df_filtered.columns:
+                with st.expander("Regresi per Konsentrasi"):
+                    st.dataframe(cached_aggregate(df, "ols_ipk_tunggu_konsentrasi",
+                                                  lambda: grouped_ols(df_filtered, "Konsentrasi", "IPK", "Masa Tunggu Kerja")),
+                                 use_container_width=True)
     else:
         st.info("Kolom 'IPK' atau 'Masa Tunggu Kerja' tidak ditemukan.")
 
     # Chi-square: Konsentrasi vs Bidang Industri
     if {"Konsentrasi","Bidang Industri"}.issubset(df_filtered.columns):
         st.subheader("Chi-Square: Konsentrasi vs Bidang Industri")
-        ct = pd.crosstab(df_filtered["Konsentrasi"], df_filtered["Bidang Industri"])
+        ct, chi2_result, chi2_error = cached_aggregate(df, "chi2_konsentrasi_industri",
+                                                       lambda: _chi2_konsentrasi_industri(df_filtered))
         st.dataframe(ct)
-        try:
-            chi2, p, dof, expected = chi2_contingency(ct)
+        if chi2_error is None:
+            chi2, p, dof = chi2_result
             st.write(f"- Chi2 = {chi2:.3f}, p-value = {p:.5f}, dof = {dof}")
             if p < 0.05:
                 st.success("Terdapat hubungan yang signifikan antara Konsentrasi dan Bidang Industri (p < 0.05).")
             else:
                 st.info("Tidak ditemukan bukti hubungan signifikan (p >= 0.05).")
-        except Exception as e:
-            st.error("Gagal melakukan uji Chi-Square: " + str(e))
+        else:
+            st.error("Gagal melakukan uji Chi-Square: " + chi2_error)
     else:
         st.info("Kolom yang diperlukan untuk Chi-Square tidak lengkap.")
 
-    # ANOVA gaji per lokasi (jika >2 grup)
-    if {"Lokasi Geografis","Gaji"}.issubset(df_filtered.columns):
-        st.subheader("Uji ANOVA: Perbedaan Rata-rata Gaji antar Lokasi")
-        groups = [grp["Gaji"].values for name, grp in df_filtered.groupby("Lokasi Geografis")]
-        if len(groups) >= 2:
-            try:
-                stat, pval = f_oneway(*groups)
-                st.write(f"F-statistic = {stat:.3f}, p-value = {pval:.5f}")
-                if pval < 0.05:
-                    st.success("Terdapat perbedaan gaji yang signifikan antar lokasi (p < 0.05).")
-                else:
-                    st.info("Tidak ada bukti perbedaan signifikan antar lokasi (p >= 0.05).")
-            except Exception as e:
-                st.error("Gagal melakukan ANOVA: " + str(e))
+    # Matriks asosiasi semua pasangan variabel kategorikal
+    st.subheader("Matriks Asosiasi Kategorikal (Cramér's V)")
+    assoc = cached_aggregate(df, "association_matrix", lambda: association_matrix(df_filtered))
+    if assoc.empty:
+        st.info("Perlu minimal 2 kolom kategorikal untuk matriks asosiasi.")
+    else:
+        fig_assoc = px.imshow(association_heatmap_frame(assoc), text_auto=".2f", zmin=0, zmax=1,
+                              color_continuous_scale="Blues", aspect="auto")
+        st.plotly_chart(fig_assoc, use_container_width=True)
+        table = assoc.rename(columns={"chi2": "Chi2", "p_value": "p-value", "cramers_v": "Cramér's V"})
+        st.dataframe(table.sort_values("Cramér's V", ascending=False), use_container_width=True, hide_index=True)
+        st.caption("Klik judul kolom untuk mengurutkan. Pasangan dengan p < 0.05 menunjukkan hubungan signifikan.")
+
+    # ANOVA & Kruskal-Wallis gaji per faktor
+    factors = {label: col for label, col in ANOVA_FACTORS.items() if col in df_filtered.columns}
+    if "Gaji" in df_filtered.columns and factors:
+        st.subheader("Uji ANOVA & Kruskal-Wallis: Perbedaan Gaji antar Kelompok")
+        factor_label = st.selectbox("Faktor", list(factors))
+        tests = {label: cached_aggregate(df, "one_way_gaji", lambda col=col: _one_way_tests(df, df_filtered, col), col)
+                 for label, col in factors.items()}
+        anova, kruskal = tests[factor_label]["anova"], tests[factor_label]["kruskal"]
+        if anova is not None:
+            st.write(f"ANOVA: F-statistic = {anova['statistic']:.3f}, p-value = {anova['p_value']:.5f} "
+                     f"({anova['n_groups']} kelompok)")
+            if anova["p_value"] < 0.05:
+                st.success(f"Terdapat perbedaan gaji yang signifikan antar {factor_label.lower()} (p < 0.05).")
+            else:
+                st.info(f"Tidak ada bukti perbedaan signifikan antar {factor_label.lower()} (p >= 0.05).")
         else:
-            st.info("Perlu minimal 2 lokasi untuk melakukan ANOVA.")
+            st.info(f"Perlu minimal 2 {factor_label.lower()} untuk melakukan ANOVA.")
+        if kruskal is not None:
+            st.write(f"Kruskal-Wallis (berbasis rank): H = {kruskal['statistic']:.3f}, "
+                     f"p-value = {kruskal['p_value']:.5f}")
+        with st.expander("Ringkasan semua faktor"):
+            summary = pd.DataFrame([
+                {"Faktor": label,
+                 "Kelompok": (t["anova"] or t["kruskal"] or {}).get("n_groups"),
+                 "F": t["anova"]["statistic"] if t["anova"] else None,
+                 "p (ANOVA)": t["anova"]["p_value"] if t["anova"] else None,
+                 "H": t["kruskal"]["statistic"] if t["kruskal"] else None,
+                 "p (Kruskal)": t["kruskal"]["p_value"] if t["kruskal"] else None}
+                for label, t in tests.items()
+            ])
+            st.dataframe(summary, use_container_width=True, hide_index=True)
+
+    # Mode resampling: p-value permutasi & CI bootstrap tanpa asumsi distribusi
+    st.subheader("Mode Resampling (Bootstrap & Permutasi)")
+    if st.checkbox("Aktifkan mode resampling", value=False):
+        c1, c2 = st.columns(2)
+        # Default mengikuti jumlah baris & CPU; budget besar tetap bisa dipilih manual
+        n_resamples = c1.select_slider("Jumlah resample", options=RESAMPLE_BUDGETS,
+                                       value=default_resamples(len(df_filtered)))
+        seed = int(c2.number_input("Seed", min_value=0, value=RESAMPLE_SEED, step=1))
+        st.caption("Hasil deterministik untuk kombinasi filter, jumlah resample, dan seed yang sama.")
+        if "Gaji" in df_filtered.columns:
+            med = cached_aggregate(df, "bootstrap_median_gaji",
+                                   lambda: bootstrap_median(df_filtered, "Gaji", n_resamples, seed), n_resamples, seed)
+            if med is not None:
+                st.write(f"- Median gaji: **Rp {med['median']:,.0f}** "
+                         f"(CI 95% bootstrap: Rp {med['lo']:,.0f} – Rp {med['hi']:,.0f})")
+        if "Gaji" in df_filtered.columns and factors:
+            factor = factors[factor_label]
+            perm = cached_aggregate(df, "permutation_anova_gaji",
+                                    lambda: permutation_anova(df_filtered, factor, "Gaji", n_resamples, seed),
+                                    factor, n_resamples, seed)
+            if perm is not None:
+                st.write(f"- Permutasi ANOVA gaji antar {factor_label.lower()}: F = {perm['statistic']:.3f}, "
+                         f"p-value permutasi = {perm['p_value']:.5f}")
+            means = cached_aggregate(df, "bootstrap_means_gaji",
+                                     lambda: bootstrap_group_means(df_filtered, factor, "Gaji", n_resamples, seed),
+                                     factor, n_resamples, seed)
+            st.dataframe(means.style.format({"Mean": "Rp {:,.0f}", "CI Bawah": "Rp {:,.0f}", "CI Atas": "Rp {:,.0f}"}),
+                         use_container_width=True, hide_index=True)
+        if {"IPK", "Masa Tunggu Kerja"}.issubset(df_filtered.columns):
+            corr = cached_aggregate(df, "bootstrap_corr_ipk_tunggu",
+                                    lambda: bootstrap_corr(df_filtered, "IPK", "Masa Tunggu Kerja", n_resamples, seed),
+                                    n_resamples, seed)
+            if corr is not None:
+                st.write(f"- Korelasi IPK & Masa Tunggu: r = {corr['r']:.3f} "
+                         f"(CI 95%: {corr['lo']:.3f} – {corr['hi']:.3f}), p-value permutasi = {corr['p_value']:.5f}")
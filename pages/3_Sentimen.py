@@ -2,9 +2,11 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from utils import load_data, init_filters, apply_filters
-from collections import Counter
-import re
+from utils import load_data, init_filters, apply_filters, cached_aggregate, filter_rows
+from agg_utils import group_codes
+from text_utils import score_sentiment, get_term_index, top_terms, get_near_dup_index, near_duplicate_groups
+
+TERM_GROUPS = ["Konsentrasi", "Tahun Angkatan"]
 
 st.set_page_config(layout="wide")
 df = load_data()
@@ -16,24 +18,29 @@ st.title("💬 Analisis Umpan Balik & Sentimen")
 if df_filtered.empty:
     st.warning("Tidak ada data setelah filter.")
 else:
-    # Ensure Sentiment column exists (if not, create simple rule-based)
+    # Kolom Sentiment dibuat sekali saat load_data (text_utils.annotate_sentiment);
+    # tanpa kolom Umpan Balik semua baris dianggap Neutral
     if "Sentiment" not in df_filtered.columns:
-        def quick_sent(s: str):
-            s = str(s).lower()
-            if any(w in s for w in ["baik","bagus","membantu","positif","recommend","recommended"]):
-                return "Positive"
-            # improvement keywords -> neutral
-            if any(w in s for w in ["perlu","perbanyak","tingkatkan","kurang","update","perbarui"]):
-                return "Neutral"
-            return "Neutral"
-        feedback_series = df_filtered["Umpan Balik"] if "Umpan Balik" in df_filtered.columns else pd.Series([None]*len(df_filtered))
-        df_filtered["Sentiment"] = feedback_series.apply(quick_sent)
-
-    sent_cnt = df_filtered["Sentiment"].value_counts().reset_index()
+        df_filtered["Sentiment"] = score_sentiment(pd.Series([None]*len(df_filtered)))
+
+    sent_cnt = df_filtered["Sentiment"].value_counts()
+    sent_cnt = sent_cnt[sent_cnt > 0].reset_index()
     sent_cnt.columns = ["Sentiment","Jumlah"]
     fig = px.bar(sent_cnt, x="Sentiment", y="Jumlah", color="Sentiment", title="Distribusi Sentimen")
     st.plotly_chart(fig, use_container_width=True)
 
+    # Umpan balik hampir-sama dikelompokkan (MinHash-LSH) per versi data; filter hanya menghitung ulang jumlah
+    st.subheader("Umpan Balik Serupa")
+    if "Umpan Balik" in df.columns:
+        similar = cached_aggregate(df, "near_duplicate_groups",
+                                   lambda: near_duplicate_groups(get_near_dup_index(df), rows=filter_rows(df)))
+        if similar.empty:
+            st.info("Tidak ada teks umpan balik untuk filter ini.")
+        else:
+            for row in similar.itertuples(index=False):
+                variasi = f" · {row.Variasi} variasi kalimat" if row.Variasi > 1 else ""
+                st.markdown(f"- **{row.Jumlah} alumni** menyampaikan kurang lebih: _“{row.Contoh}”_{variasi}")
+
     st.subheader("Contoh Umpan Balik")
     if "Umpan Balik" in df_filtered.columns:
         sample_df = df_filtered[["Umpan Balik","Sentiment"]].dropna()
@@ -43,3 +50,31 @@ else:
             st.info("Tidak ada teks umpan balik non-null untuk ditampilkan.")
     else:
         st.info("Kolom 'Umpan Balik' tidak tersedia.")
+
+    # Kata kunci per kelompok dari matriks term pra-hitung (tanpa tokenisasi ulang)
+    st.subheader("Kata Kunci Umpan Balik per Kelompok")
+    groups = [c for c in TERM_GROUPS if c in df.columns]
+    if "Umpan Balik" in df.columns and groups:
+        c1, c2 = st.columns(2)
+        group_col = c1.selectbox("Kelompokkan berdasarkan", groups)
+        n_terms = c2.slider("Jumlah kata kunci", 3, 20, 8)
+
+        def _keywords():
+            codes, labels = group_codes(df[group_col])
+            return top_terms(get_term_index(df), codes, labels, rows=filter_rows(df), n=n_terms)
+
+        terms = cached_aggregate(df, "top_terms", _keywords, group_col, n_terms)
+        if terms.empty:
+            st.info("Tidak ada kata kunci untuk filter ini.")
+        else:
+            terms = terms.assign(Kelompok=terms["Kelompok"].astype(str))  # Tahun Angkatan → label diskret
+            fig_terms = px.bar(terms, x="TF-IDF", y="Term", color="Kelompok", facet_col="Kelompok",
+                               facet_col_wrap=3, orientation="h", hover_data=["Jumlah"],
+                               title=f"Kata kunci teratas per {group_col} (TF-IDF)")
+            fig_terms.update_yaxes(matches=None, showticklabels=True, autorange="reversed")
+            fig_terms.update_layout(showlegend=False, height=max(400, 60 * n_terms))
+            st.plotly_chart(fig_terms, use_container_width=True)
+            with st.expander("Tabel kata kunci"):
+                st.dataframe(terms, use_container_width=True, hide_index=True)
+    else:
+        st.info("Kolom 'Umpan Balik' atau kolom pengelompokan tidak tersedia.")
@@ -3,8 +3,7 @@ import streamlit as st
 import plotly.express as px
 import pandas as pd
 from utils import load_data, init_filters, apply_filters
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
+from cluster_utils import QUALITY_SAMPLE, SWEEP_K, cluster_model, cluster_sweep
 
 st.set_page_config(layout="wide")
 df = load_data()
@@ -35,12 +34,41 @@ else:
         if len(df_cluster) < k:
             st.warning("Data kurang untuk jumlah klaster yang dipilih setelah dropna.")
         else:
-            # K-Means
-            scaler = StandardScaler()
-            X = scaler.fit_transform(df_cluster[cols_to_use])
-            km = KMeans(n_clusters=k, random_state=42, n_init=10)
-            labels = km.fit_predict(X)
-            df_cluster["Cluster"] = labels.astype(int)
+            # K-Means (registry: model yang sama tidak di-fit ulang tiap rerun)
+            model = cluster_model(df, df_cluster, cols_to_use, k)
+            df_cluster["Cluster"] = model["labels"].astype(int)
+            st.caption(
+                f"Inertia {model['inertia']:,.1f} · {model['n_iter']} iterasi"
+                + (" · warm start dari solusi tersimpan" if model["warm_start"] else "")
+            )
+            if model["mode"] == "minibatch":
+                st.info(
+                    f"Data besar ({len(df_cluster):,} baris): klaster di-fit dengan Mini-Batch K-Means. "
+                    f"Inertia {model['quality_loss']:+.1%} dibanding K-Means penuh pada sampel "
+                    f"{min(len(df_cluster), QUALITY_SAMPLE):,} baris."
+                )
+
+            # Pemilihan k: sweep k=2..8 (paralel), elbow + silhouette sampel
+            st.subheader("Pemilihan Jumlah Klaster")
+            if st.checkbox(f"Bandingkan k = {SWEEP_K[0]}–{SWEEP_K[-1]} (elbow & silhouette)"):
+                sweep = cluster_sweep(df, df_cluster, cols_to_use)
+                table = sweep["table"]
+                c1, c2 = st.columns(2)
+                with c1:
+                    fig = px.line(table, x="k", y="Inertia", markers=True, title="Elbow (Inertia)")
+                    st.plotly_chart(fig, use_container_width=True)
+                with c2:
+                    fig = px.line(table, x="k", y="Silhouette", markers=True,
+                                  title=f"Silhouette (sampel terstratifikasi {sweep['sample_size']:,} baris)")
+                    st.plotly_chart(fig, use_container_width=True)
+                if sweep["recommended"] is not None:
+                    st.success(
+                        f"Rekomendasi: **k = {sweep['recommended']}** (silhouette tertinggi); "
+                        f"titik elbow di k = {sweep['elbow']}."
+                        + ("" if sweep["recommended"] == k else " Atur slider k di sidebar untuk memakainya.")
+                    )
+                with st.expander("Tabel sweep"):
+                    st.dataframe(table.round(4), hide_index=True)
 
             # Ringkasan per klaster
             st.subheader("Ringkasan per Klaster")
@@ -5,7 +5,7 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 import plotly.express as px
-from utils import load_data, init_filters, apply_filters
+from utils import load_data, init_filters, apply_filters, memory_report
 
 st.set_page_config(layout="wide")
 df = load_data()
@@ -20,6 +20,13 @@ else:
     st.subheader("Ringkasan Statistik Deskriptif")
     st.dataframe(df_filtered.describe(include="all").T)
 
+    report = df.attrs.get("memory_report")
+    if report:
+        before_mb = report["before_bytes"] / 1024**2
+        after_mb = report["after_bytes"] / 1024**2
+        with st.expander(f"💾 Memori dataset: {before_mb:,.1f} MB → {after_mb:,.1f} MB (skema ringkas)"):
+            st.dataframe(memory_report(df), use_container_width=True)
+
     st.subheader("Distribusi Variabel Numerik")
     num_cols = df_filtered.select_dtypes(include=[np.number]).columns.tolist()
     if num_cols:
@@ -37,6 +44,7 @@ else:
         chosen_cat = st.selectbox("Pilih variabel kategorikal:", cat_cols)
         freq = df_filtered[chosen_cat].value_counts().reset_index()
         freq.columns = [chosen_cat, "Jumlah"]
+        freq = freq[freq["Jumlah"] > 0]
         fig2 = px.bar(freq, x=chosen_cat, y="Jumlah", title=f"Distribusi {chosen_cat}")
         st.plotly_chart(fig2, use_container_width=True)
     else:
@@ -62,6 +70,7 @@ else:
         var1 = st.selectbox("Pilih variabel kategorikal 1:", cat_cols, index=0)
         var2 = st.selectbox("Pilih variabel kategorikal 2:", cat_cols, index=1)
         ct = pd.crosstab(df_filtered[var1], df_filtered[var2])
+        ct = ct.loc[ct.sum(axis=1) > 0, ct.sum(axis=0) > 0]
         st.dataframe(ct)
 
 # Tambahan insight otomatis
@@ -0,0 +1,79 @@
+# pool_utils.py
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# -------------------------------------------------
+# Process pool bersama (resampling, sweep K-Means, skor sentimen)
+# -------------------------------------------------
+POOL_WORKERS = min(4, os.cpu_count() or 1)
+# forkserver/spawn: worker tidak mewarisi thread & lock milik server Streamlit
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+_WORKER_LIMITS = None
+
+def _limit_worker_threads() -> None:
+    """Pool initializer: one BLAS/OpenMP thread per worker, so workers x threads <= CPUs."""
+    global _WORKER_LIMITS
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = "1"
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    _WORKER_LIMITS = threadpool_limits(limits=1)
+
+def _shutdown_pool(pool: ProcessPoolExecutor) -> None:
+    pool.shutdown(wait=False, cancel_futures=True)
+
+@atexit.register
+def _shutdown_current_pool() -> None:
+    with _POOL_LOCK:
+        pool = _POOL
+    if pool is not None:
+        _shutdown_pool(pool)
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process pool shared by every module, created on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=POOL_WORKERS,
+                mp_context=multiprocessing.get_context(POOL_START_METHOD),
+                initializer=_limit_worker_threads,
+            )
+        return _POOL
+
+def discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Shut down a broken pool (workers included) so the next call starts a fresh one."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    _shutdown_pool(pool)
+
+def pool_map(fn, calls: list):
+    """fn(*args) for each args tuple, run on the shared pool.
+
+    Returns None when there is a single worker, the pool cannot be started or
+    a worker died (BrokenProcessPool); the caller then runs the calls
+    serially. Exceptions raised by fn itself propagate unchanged.
+    """
+    if POOL_WORKERS <= 1 or len(calls) <= 1:
+        return None
+    try:
+        pool = get_process_pool()
+    except OSError:
+        return None  # proses baru tidak bisa dibuat → jalankan berurutan
+    try:
+        futures = [pool.submit(fn, *args) for args in calls]
+        return [f.result() for f in futures]
+    except BrokenProcessPool:
+        discard_process_pool(pool)
+        return None
@@ -0,0 +1,458 @@
+# stats_utils.py
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+import numpy as np
+import pandas as pd
+from scipy import stats as sps
+from agg_utils import group_codes
+from pool_utils import POOL_WORKERS, pool_map
+
+# -------------------------------------------------
+# Regresi OLS sederhana dari statistik cukup
+# -------------------------------------------------
+def _xy(d: pd.DataFrame, x_col: str, y_col: str):
+    x = d[x_col].to_numpy(dtype="float64", na_value=np.nan)
+    y = d[y_col].to_numpy(dtype="float64", na_value=np.nan)
+    ok = ~(np.isnan(x) | np.isnan(y))
+    return x, y, ok
+
+def sufficient_stats(d: pd.DataFrame, x_col: str, y_col: str) -> dict:
+    """n, Σx, Σy, Σxy, Σx², Σy² over rows where both columns are present."""
+    x, y, ok = _xy(d, x_col, y_col)
+    x, y = x[ok], y[ok]
+    return {
+        "n": float(len(x)), "sx": x.sum(), "sy": y.sum(),
+        "sxy": (x * y).sum(), "sxx": (x * x).sum(), "syy": (y * y).sum(),
+    }
+
+def ols_from_stats(s: dict) -> dict:
+    """Slope, intercept, R², stderr and two-sided p-value of the slope.
+
+    Stats from disjoint subsets can be added field by field before calling
+    this, so fits merge across filter cells.
+    """
+    n = s["n"]
+    if n < 3:
+        return None
+    sxx_c = s["sxx"] - s["sx"] ** 2 / n
+    syy_c = s["syy"] - s["sy"] ** 2 / n
+    sxy_c = s["sxy"] - s["sx"] * s["sy"] / n
+    if sxx_c <= 0:
+        return None
+    slope = sxy_c / sxx_c
+    intercept = (s["sy"] - slope * s["sx"]) / n
+    r2 = (sxy_c ** 2) / (sxx_c * syy_c) if syy_c > 0 else 0.0
+    dof = n - 2
+    sse = max(syy_c - slope * sxy_c, 0.0)
+    se = np.sqrt(sse / dof / sxx_c)
+    if se > 0:
+        p_value = float(2 * sps.t.sf(abs(slope / se), dof))
+    else:
+        p_value = 0.0
+    return {"n": int(n), "slope": float(slope), "intercept": float(intercept),
+            "r2": float(r2), "p_value": p_value, "stderr": float(se)}
+
+def ols_fit(d: pd.DataFrame, x_col: str, y_col: str) -> dict:
+    """OLS of y on x plus the two endpoints of the fitted line for plotting."""
+    fit = ols_from_stats(sufficient_stats(d, x_col, y_col))
+    if fit is None:
+        return None
+    x, _, ok = _xy(d, x_col, y_col)
+    x0, x1 = float(np.min(x[ok])), float(np.max(x[ok]))
+    fit["line_x"] = [x0, x1]
+    fit["line_y"] = [fit["intercept"] + fit["slope"] * x0, fit["intercept"] + fit["slope"] * x1]
+    return fit
+
+def grouped_ols(d: pd.DataFrame, group_col: str, x_col: str, y_col: str) -> pd.DataFrame:
+    """Per-group OLS from bincount sufficient statistics (one pass for all groups)."""
+    codes, labels = group_codes(d[group_col])
+    x, y, ok = _xy(d, x_col, y_col)
+    ok &= codes >= 0
+    codes, x, y = codes[ok], x[ok], y[ok]
+    m = len(labels)
+    sums = {
+        "n": np.bincount(codes, minlength=m).astype("float64"),
+        "sx": np.bincount(codes, weights=x, minlength=m),
+        "sy": np.bincount(codes, weights=y, minlength=m),
+        "sxy": np.bincount(codes, weights=x * y, minlength=m),
+        "sxx": np.bincount(codes, weights=x * x, minlength=m),
+        "syy": np.bincount(codes, weights=y * y, minlength=m),
+    }
+    rows = []
+    for g, label in enumerate(labels):
+        fit = ols_from_stats({k: v[g] for k, v in sums.items()})
+        if fit is not None:
+            rows.append({group_col: label, "n": fit["n"], "Slope": fit["slope"], "Intercept": fit["intercept"],
+                         "R²": fit["r2"], "p-value": fit["p_value"]})
+    return pd.DataFrame(rows, columns=[group_col, "n", "Slope", "Intercept", "R²", "p-value"])
+
+# -------------------------------------------------
+# Asosiasi antar variabel kategorikal (Chi-Square / Cramér's V)
+# -------------------------------------------------
+ASSOCIATION_MAX_CATEGORIES = 50
+# Kolom turunan (Provinsi ← Lokasi Geografis, Sentiment ← Umpan Balik) dan teks
+# bebas tidak diuji: pasangan dengan sumbernya selalu V ≈ 1 secara trivial
+ASSOCIATION_EXCLUDE = {"Provinsi", "Sentiment", "Umpan Balik"}
+
+def association_columns(d: pd.DataFrame) -> list:
+    """Categorical/text columns with 2..ASSOCIATION_MAX_CATEGORIES distinct values.
+
+    Derived and free-text columns (ASSOCIATION_EXCLUDE) are skipped.
+    """
+    cols = []
+    for col in d.select_dtypes(include=["category", "object", "string"]).columns:
+        if col in ASSOCIATION_EXCLUDE:
+            continue
+        n_unique = d[col].nunique(dropna=True)
+        if 2 <= n_unique <= ASSOCIATION_MAX_CATEGORIES:
+            cols.append(col)
+    return cols
+
+def _chi2_from_codes(a: np.ndarray, na: int, b: np.ndarray, nb: int) -> dict:
+    ok = (a >= 0) & (b >= 0)
+    a, b = a[ok], b[ok]
+    table = np.bincount(a * nb + b, minlength=na * nb).reshape(na, nb).astype("float64")
+    # Kategori yang tidak muncul (baris/kolom nol) dibuang seperti crosstab
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    r, c = table.shape
+    n = table.sum()
+    if r < 2 or c < 2:
+        return {"chi2": np.nan, "p_value": np.nan, "dof": 0, "cramers_v": np.nan, "n": int(n)}
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    dof = (r - 1) * (c - 1)
+    chi2_raw = float(((table - expected) ** 2 / expected).sum())
+    observed = table
+    if dof == 1:
+        # Koreksi Yates, sama dengan default scipy.stats.chi2_contingency
+        diff = expected - table
+        observed = table + np.sign(diff) * np.minimum(0.5, np.abs(diff))
+    chi2 = float(((observed - expected) ** 2 / expected).sum())
+    return {
+        "chi2": chi2,
+        "p_value": float(sps.chi2.sf(chi2, dof)),
+        "dof": int(dof),
+        "cramers_v": float(np.sqrt(chi2_raw / (n * min(r - 1, c - 1)))),
+        "n": int(n),
+    }
+
+def association_matrix(d: pd.DataFrame, columns: list = None, max_workers: int = 4) -> pd.DataFrame:
+    """Chi-square, p-value, dof and Cramér's V for every pair of categorical columns.
+
+    Each column is factorized to integer codes once; every contingency table
+    is a single 2-D bincount. Pairs are evaluated concurrently on a thread
+    pool (the NumPy kernels release the GIL for most of the work).
+    """
+    if columns is None:
+        columns = association_columns(d)
+    coded = {col: group_codes(d[col]) for col in columns}
+    pairs = list(combinations(columns, 2))
+
+    def run(pair):
+        (ca, (a, la)), (cb, (b, lb)) = (pair[0], coded[pair[0]]), (pair[1], coded[pair[1]])
+        return {"Variabel A": ca, "Variabel B": cb, **_chi2_from_codes(a, len(la), b, len(lb))}
+
+    if max_workers and max_workers > 1 and len(pairs) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            rows = list(pool.map(run, pairs))
+    else:
+        rows = [run(p) for p in pairs]
+    return pd.DataFrame(rows, columns=["Variabel A", "Variabel B", "chi2", "p_value", "dof", "cramers_v", "n"])
+
+def association_heatmap_frame(assoc: pd.DataFrame) -> pd.DataFrame:
+    """Symmetric Cramér's V matrix (diagonal = 1) for a heatmap."""
+    cols = list(dict.fromkeys(assoc["Variabel A"].tolist() + assoc["Variabel B"].tolist()))
+    mat = pd.DataFrame(np.eye(len(cols)), index=cols, columns=cols)
+    for a, b, v in assoc[["Variabel A", "Variabel B", "cramers_v"]].itertuples(index=False):
+        mat.loc[a, b] = mat.loc[b, a] = v
+    return mat
+
+# -------------------------------------------------
+# ANOVA & Kruskal-Wallis satu arah
+# -------------------------------------------------
+def group_moments(d: pd.DataFrame, group_col: str, value_col: str):
+    """(labels, {"n", "sum", "sumsq"}) per group via bincount over category codes."""
+    codes, labels = group_codes(d[group_col])
+    v = d[value_col].to_numpy(dtype="float64", na_value=np.nan)
+    ok = (codes >= 0) & ~np.isnan(v)
+    codes, v = codes[ok], v[ok]
+    m = len(labels)
+    return labels, {
+        "n": np.bincount(codes, minlength=m).astype("float64"),
+        "sum": np.bincount(codes, weights=v, minlength=m),
+        "sumsq": np.bincount(codes, weights=v * v, minlength=m),
+    }
+
+def anova_from_moments(moments: dict) -> dict:
+    """One-way ANOVA F test from per-group n/sum/sumsq (empty groups ignored).
+
+    Moments of disjoint subsets can be added element-wise beforehand.
+    """
+    n, s, ss = (np.asarray(moments[k], dtype="float64") for k in ("n", "sum", "sumsq"))
+    keep = n > 0
+    n, s, ss = n[keep], s[keep], ss[keep]
+    k, total = len(n), n.sum()
+    if k < 2 or total <= k:
+        return None
+    ss_within = float(np.maximum(ss - s * s / n, 0.0).sum())
+    ss_between = float((s * s / n).sum() - s.sum() ** 2 / total)
+    df_between, df_within = k - 1, int(total - k)
+    if ss_within <= 0:
+        return None
+    f = (ss_between / df_between) / (ss_within / df_within)
+    return {"statistic": float(f), "p_value": float(sps.f.sf(f, df_between, df_within)),
+            "df_between": df_between, "df_within": df_within, "n_groups": k}
+
+def rank_order(values: np.ndarray) -> np.ndarray:
+    """Stable ascending argsort (NaN last); computed once and reused for every subset."""
+    return np.argsort(values, kind="stable")
+
+def kruskal_from_order(values: np.ndarray, codes: np.ndarray, order: np.ndarray) -> dict:
+    """Kruskal-Wallis H test given rows pre-sorted by value.
+
+    order may be any subsequence of a global rank_order(), so a filtered
+    subset is ranked in O(n) without sorting again.
+    """
+    order = order[(codes[order] >= 0) & ~np.isnan(values[order])]
+    v, g = values[order], codes[order]
+    total = len(v)
+    if total < 2:
+        return None
+    # Rank rata-rata untuk nilai kembar (ties)
+    starts = np.flatnonzero(np.r_[True, v[1:] != v[:-1]])
+    ties = np.diff(np.r_[starts, total])
+    ranks = np.repeat(starts + (ties + 1) / 2.0, ties)
+    n = np.bincount(g).astype("float64")
+    r = np.bincount(g, weights=ranks)
+    keep = n > 0
+    n, r = n[keep], r[keep]
+    k = len(n)
+    if k < 2:
+        return None
+    h = 12.0 / (total * (total + 1)) * (r * r / n).sum() - 3 * (total + 1)
+    correction = 1 - (ties ** 3 - ties).sum() / (total ** 3 - total)
+    if correction <= 0:
+        return None
+    h /= correction
+    return {"statistic": float(h), "p_value": float(sps.chi2.sf(h, k - 1)), "n_groups": k}
+
+# -------------------------------------------------
+# Resampling: bootstrap CI & uji permutasi
+# -------------------------------------------------
+RESAMPLE_BUDGETS = [1000, 2000, 5000, 10000]
+RESAMPLE_SEED = 42
+# Biaya kasar jalur baris (korelasi dengan banyak nilai unik) per core:
+# 100k baris × 1k resample ≈ 6 s, × 10k ≈ 60 s. Default halaman dibatasi
+# agar baris × resample per worker tidak melewati RESAMPLE_DEFAULT_WORK.
+RESAMPLE_DEFAULT = 2000
+RESAMPLE_DEFAULT_WORK = 100_000_000
+RESAMPLE_MAX_ATOMS = 5000        # nilai unik maksimum untuk jalur matriks hitungan (multinomial)
+RESAMPLE_MAX_TABLE = 5000        # sel tabel maksimum untuk permutasi eksak via hipergeometrik
+RESAMPLE_BATCH_CELLS = 2_000_000  # elemen per matriks int64 (~16 MB; puncak ≈ 3× dengan array sementara)
+RESAMPLE_MAX_BATCH = 1000
+
+def default_resamples(n_rows: int) -> int:
+    """Largest budget up to RESAMPLE_DEFAULT whose rows × resamples per worker fits RESAMPLE_DEFAULT_WORK."""
+    fits = [b for b in RESAMPLE_BUDGETS
+            if b <= RESAMPLE_DEFAULT and n_rows * b <= RESAMPLE_DEFAULT_WORK * POOL_WORKERS]
+    return fits[-1] if fits else RESAMPLE_BUDGETS[0]
+
+def _resample(kernel, data, width: int, n_resamples: int, seed: int) -> np.ndarray:
+    """Run kernel(data, size, seed_seq) over batches of resamples and stack the results.
+
+    width is the number of matrix columns one resample needs; batch sizes
+    and the SeedSequence children depend only on (width, n_resamples, seed),
+    so results are identical whether batches run inline or on the pool.
+    """
+    batch = max(1, min(n_resamples, RESAMPLE_MAX_BATCH, RESAMPLE_BATCH_CELLS // max(width, 1)))
+    sizes = [batch] * (n_resamples // batch)
+    if n_resamples % batch:
+        sizes.append(n_resamples % batch)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    calls = [(data, size, ss) for size, ss in zip(sizes, seeds)]
+    results = pool_map(kernel, calls)
+    if results is None:
+        results = [kernel(*args) for args in calls]
+    return np.concatenate(results)
+
+def _boot_weights(counts: np.ndarray, size: int, rng) -> np.ndarray:
+    """(size, k) multiplicity of each distinct value in `size` bootstrap resamples.
+
+    Few distinct values: one multinomial draw per resample (O(k)). Otherwise
+    row-index matrices are drawn and counted per value, RESAMPLE_BATCH_CELLS
+    // n resamples at a time, so memory follows n_rows rather than k.
+    """
+    n, k = int(counts.sum()), len(counts)
+    if k <= RESAMPLE_MAX_ATOMS:
+        return rng.multinomial(n, counts / n, size=size)
+    atom_of_row = np.repeat(np.arange(k), counts)
+    step = max(1, RESAMPLE_BATCH_CELLS // n)
+    out = np.empty((size, k), dtype=np.int64)
+    for start in range(0, size, step):
+        m = min(step, size - start)
+        idx = atom_of_row[rng.integers(0, n, (m, n))] + (np.arange(m) * k)[:, None]
+        out[start:start + m] = np.bincount(idx.ravel(), minlength=m * k).reshape(m, k)
+    return out
+
+def _perm_sums_table(args, size: int, rng) -> np.ndarray:
+    """Per-row Σ value for random tables with fixed margins (exact label permutation).
+
+    Rows are filled one by one with a chain of vectorized hypergeometric
+    draws over the distinct values still left in the pool.
+    """
+    row_counts, col_values, col_counts = args
+    r, c = len(row_counts), len(col_counts)
+    remaining = np.tile(col_counts, (size, 1))
+    out = np.empty((size, r))
+    for i in range(r - 1):
+        need = np.full(size, row_counts[i])
+        pool_left = remaining.sum(axis=1)
+        acc = np.zeros(size)
+        for j in range(c - 1):
+            if not need.any():
+                break
+            pool_left -= remaining[:, j]
+            take = rng.hypergeometric(remaining[:, j], pool_left, need)
+            remaining[:, j] -= take
+            need -= take
+            acc += take * col_values[j]
+        acc += need * col_values[c - 1]
+        remaining[:, c - 1] -= need
+        out[:, i] = acc
+    out[:, r - 1] = remaining @ col_values
+    return out
+
+def _perm_sums_rows(args, size: int, rng) -> np.ndarray:
+    """Per-row Σ value after shuffling row codes with a batched permutation matrix."""
+    row_codes, values, r = args
+    perm = rng.permuted(np.tile(row_codes, (size, 1)), axis=1) + (np.arange(size) * r)[:, None]
+    return np.bincount(perm.ravel(), weights=np.tile(values, size), minlength=size * r).reshape(size, r)
+
+def _perm_sampler(row_codes: np.ndarray, values: np.ndarray):
+    """(sampler, args, width, row_counts) for permuting row_codes against values."""
+    row_counts = np.bincount(row_codes)
+    col_values, col_counts = np.unique(values, return_counts=True)
+    if (len(row_counts) - 1) * (len(col_counts) - 1) <= RESAMPLE_MAX_TABLE:
+        return _perm_sums_table, (row_counts, col_values, col_counts), len(col_counts), row_counts
+    return _perm_sums_rows, (row_codes, values, len(row_counts)), len(values), row_counts
+
+def _corr_from_sums(n, sx, sy, sxx, syy, sxy):
+    cov = sxy - sx * sy / n
+    var_x, var_y = sxx - sx * sx / n, syy - sy * sy / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return cov / np.sqrt(var_x * var_y)
+
+def _boot_means(data, size, seed_seq):
+    rng = np.random.default_rng(seed_seq)
+    return np.column_stack([_boot_weights(c, size, rng) @ v / c.sum() for v, c in data])
+
+def _boot_median(data, size, seed_seq):
+    values, counts = data  # values terurut naik
+    rng = np.random.default_rng(seed_seq)
+    cum = _boot_weights(counts, size, rng).cumsum(axis=1)
+    n = int(counts.sum())
+    # Median = rata-rata nilai pada rank (n+1)//2 dan n//2+1 (sama dengan np.median)
+    lo = (cum < (n + 1) // 2).sum(axis=1)
+    hi = (cum < n // 2 + 1).sum(axis=1)
+    return (values[lo] + values[hi]) / 2
+
+def _boot_corr(data, size, seed_seq):
+    x, y, counts = data
+    rng = np.random.default_rng(seed_seq)
+    w = _boot_weights(counts, size, rng).astype("float64")
+    return _corr_from_sums(counts.sum(), w @ x, w @ y, w @ (x * x), w @ (y * y), w @ (x * y))
+
+def _perm_f(data, size, seed_seq):
+    sampler, args, counts, total, total_sum, total_sumsq = data
+    rng = np.random.default_rng(seed_seq)
+    sums = sampler(args, size, rng)
+    grand = total_sum ** 2 / total
+    ss_between = (sums * sums / counts).sum(axis=1) - grand
+    k = len(counts)
+    with np.errstate(divide="ignore"):
+        return (ss_between / (k - 1)) / ((total_sumsq - grand - ss_between) / (total - k))
+
+def _perm_corr(data, size, seed_seq):
+    sampler, args, x_values, n, sx, sy, sxx, syy = data
+    rng = np.random.default_rng(seed_seq)
+    sxy = sampler(args, size, rng) @ x_values
+    return _corr_from_sums(n, sx, sy, sxx, syy, sxy)
+
+def _percentile_ci(samples: np.ndarray, alpha: float):
+    lo, hi = np.nanquantile(samples, [alpha / 2, 1 - alpha / 2], axis=0)
+    return lo, hi
+
+def _perm_p_value(samples: np.ndarray, observed: float, two_sided: bool = False) -> float:
+    if two_sided:
+        extreme = np.abs(samples) >= abs(observed)
+    else:
+        extreme = samples >= observed
+    return float((1 + np.count_nonzero(extreme)) / (1 + len(samples)))
+
+def bootstrap_group_means(d: pd.DataFrame, group_col: str, value_col: str,
+                          n_resamples: int = 2000, seed: int = RESAMPLE_SEED, alpha: float = 0.05) -> pd.DataFrame:
+    """Mean and percentile bootstrap CI of value_col per group (resampled within each group)."""
+    codes, labels = group_codes(d[group_col])
+    v = d[value_col].to_numpy(dtype="float64", na_value=np.nan)
+    ok = (codes >= 0) & ~np.isnan(v)
+    codes, v = codes[ok], v[ok]
+    present = np.flatnonzero(np.bincount(codes, minlength=len(labels)))
+    if len(present) == 0:
+        return pd.DataFrame(columns=[group_col, "n", "Mean", "CI Bawah", "CI Atas"])
+    atoms = [np.unique(v[codes == g], return_counts=True) for g in present]
+    width = sum(len(a) for a, _ in atoms)
+    samples = _resample(_boot_means, atoms, width, n_resamples, seed)
+    lo, hi = _percentile_ci(samples, alpha)
+    return pd.DataFrame({
+        group_col: [labels[g] for g in present],
+        "n": [int(c.sum()) for _, c in atoms],
+        "Mean": [float(a @ c / c.sum()) for a, c in atoms],
+        "CI Bawah": lo, "CI Atas": hi,
+    })
+
+def bootstrap_median(d: pd.DataFrame, value_col: str, n_resamples: int = 2000,
+                     seed: int = RESAMPLE_SEED, alpha: float = 0.05) -> dict:
+    """Median of value_col with a percentile bootstrap CI."""
+    v = d[value_col].to_numpy(dtype="float64", na_value=np.nan)
+    v = v[~np.isnan(v)]
+    if len(v) < 2:
+        return None
+    atoms = np.unique(v, return_counts=True)
+    lo, hi = _percentile_ci(_resample(_boot_median, atoms, len(atoms[0]), n_resamples, seed), alpha)
+    return {"median": float(np.median(v)), "lo": float(lo), "hi": float(hi), "n": len(v)}
+
+def bootstrap_corr(d: pd.DataFrame, x_col: str, y_col: str, n_resamples: int = 2000,
+                   seed: int = RESAMPLE_SEED, alpha: float = 0.05) -> dict:
+    """Pearson r with a percentile bootstrap CI and a two-sided permutation p-value."""
+    x, y, ok = _xy(d, x_col, y_col)
+    x, y = x[ok], y[ok]
+    n = len(x)
+    if n < 3:
+        return None
+    sums = (x.sum(), y.sum(), (x * x).sum(), (y * y).sum())
+    r = float(_corr_from_sums(n, *sums, (x * y).sum()))
+    pairs, pair_counts = np.unique(np.column_stack([x, y]), axis=0, return_counts=True)
+    boot = _resample(_boot_corr, (pairs[:, 0], pairs[:, 1], pair_counts), len(pair_counts), n_resamples, seed)
+    lo, hi = _percentile_ci(boot, alpha)
+    x_values, x_codes = np.unique(x, return_inverse=True)
+    sampler, args, width, _ = _perm_sampler(x_codes.ravel(), y)
+    perm = _resample(_perm_corr, (sampler, args, x_values, n, *sums), width, n_resamples, seed + 1)
+    return {"r": r, "lo": float(lo), "hi": float(hi), "p_value": _perm_p_value(perm, r, two_sided=True), "n": n}
+
+def permutation_anova(d: pd.DataFrame, group_col: str, value_col: str,
+                      n_resamples: int = 2000, seed: int = RESAMPLE_SEED) -> dict:
+    """Permutation p-value of the one-way ANOVA F statistic (group labels shuffled)."""
+    _, moments = group_moments(d, group_col, value_col)
+    observed = anova_from_moments(moments)
+    if observed is None:
+        return None
+    codes, _ = group_codes(d[group_col])
+    v = d[value_col].to_numpy(dtype="float64", na_value=np.nan)
+    ok = (codes >= 0) & ~np.isnan(v)
+    v = v[ok]
+    # Kode dipadatkan ke kelompok yang muncul saja
+    _, codes = np.unique(codes[ok], return_inverse=True)
+    sampler, args, width, counts = _perm_sampler(codes.ravel(), v)
+    data = (sampler, args, counts, len(v), v.sum(), (v * v).sum())
+    samples = _resample(_perm_f, data, width, n_resamples, seed)
+    return {"statistic": observed["statistic"], "p_value": _perm_p_value(samples, observed["statistic"]),
+            "n_resamples": n_resamples}
@@ -404,7 +404,7 @@ fig.show()
 *   No statistically significant relationship was found between study concentration and the industry field where alumni work (P-value 0.8178).
 *   There was no statistically significant difference in average salary based on participation in extracurricular activities (P-value 0.9926) or geographical location (P-value 0.0640) in this dataset.
 *   Cluster analysis identified distinct alumni segments based on numerical features like salary and graduation year.
-*   Sentiment analysis on alumni feedback in the dummy data was predominantly neutral (86.57%), with some positive feedback (13.43%) and no negative feedback.
+*   Sentiment analysis on alumni feedback (the same lexicon scorer as the dashboard) labels all dummy feedback as neutral: the texts are improvement suggestions without sentiment words. The earlier positive share came from matching "baik" inside "sebaiknya"; negative feedback, including negations such as "tidak relevan", is detected when present.
 
 ### Insights or Next Steps
 
@@ -848,22 +848,17 @@ for col in numerical_cols_clustering:
 Lakukan analisis sentimen pada kolom 'Umpan Balik' untuk mengklasifikasikan umpan balik menjadi kategori (misalnya: Positif, Negatif, Netral) dan tampilkan distribusinya.
 
 **Reasoning**:
-Define a function for sentiment analysis on the 'Umpan Balik' column using a simple keyword-based approach, apply it to create a new 'Sentiment' column, calculate the frequency and percentage distribution of sentiment labels, and display the results.
+Score the 'Umpan Balik' column with the dashboard's lexicon scorer (text_utils.score_sentiment) to create a new 'Sentiment' column, calculate the frequency and percentage distribution of sentiment labels, and display the results.
 """
 
-# 1. Definisikan fungsi analisis sentimen sederhana
-def analyze_sentiment(feedback):
-    feedback_lower = feedback.lower()
-    if "tingkatkan" in feedback_lower or "perbanyak" in feedback_lower or "perlu diperbarui" in feedback_lower or "perlu ada" in feedback_lower:
-        return "Neutral" # These suggest areas for improvement but aren't explicitly negative
-    elif "baik" in feedback_lower or "bagus" in feedback_lower or "membantu" in feedback_lower or "bermanfaat" in feedback_lower:
-         return "Positive"
-    # For this dummy data, we assume other feedbacks are neutral or not explicitly negative
-    else:
-        return "Neutral"
+# 1. Analisis sentimen memakai scorer yang sama dengan dashboard (text_utils.py),
+#    sehingga leksikon & aturan tidak disalin; jalankan dari root repo agar
+#    text_utils dapat diimpor
+from text_utils import SENTIMENT_LEXICON_VERSION, score_sentiment
+print(f"Leksikon sentimen versi {SENTIMENT_LEXICON_VERSION}")
 
-# 2. Terapkan fungsi ke kolom 'Umpan Balik'
-df['Sentiment'] = df['Umpan Balik'].apply(analyze_sentiment)
+# 2. Terapkan ke kolom 'Umpan Balik'
+df['Sentiment'] = score_sentiment(df['Umpan Balik']).astype(str)
 
 # 3. Hitung jumlah kemunculan setiap kategori sentimen
 sentiment_counts = df['Sentiment'].value_counts()
@@ -909,7 +904,7 @@ Berdasarkan analisis data tracer alumni Teknik Elektro, ditemukan beberapa pola
 6.  **Aktivitas Ekstrakurikuler & Penempatan Kerja:** Dalam data ini, **tidak ditemukan hubungan yang signifikan secara statistik** antara partisipasi dalam Aktivitas Ekstrakurikuler dan status Penempatan Kerja (p-value = 0.136).
 7.  **Konsentrasi Studi & Bidang Industri:** Hasil analisis (Chi-Square) menunjukkan **tidak terdapat hubungan yang signifikan secara statistik** antara Konsentrasi Studi yang diambil alumni dan Bidang Industri tempat mereka bekerja (p-value = 0.9578). Ini bisa mengindikasikan fleksibilitas karir alumni atau perluasan relevansi kurikulum di berbagai sektor.
 8.  **Klaster Alumni:** Analisis klaster mengidentifikasi segmen-segmen alumni yang berbeda berdasarkan kombinasi faktor numerik seperti Gaji, Tahun Angkatan, IPK, Relevansi Kurikulum, dan Masa Tunggu Kerja. Ini dapat membantu memahami profil alumni yang berbeda (misalnya: alumni baru dengan gaji awal vs. alumni berpengalaman dengan gaji lebih tinggi).
-9.  **Sentimen Umpan Balik:** Sentimen umpan balik alumni pada data dummy ini didominasi oleh kategori Netral (88%), yang seringkali berisi saran untuk perbaikan kurikulum atau program. Sebagian kecil bersifat Positif (12%), dan tidak ada umpan balik Negatif eksplisit yang terdeteksi oleh metode analisis sentimen sederhana.
+9.  **Sentimen Umpan Balik:** Dengan leksikon yang sama seperti dashboard, seluruh umpan balik alumni pada data dummy ini berlabel Netral: isinya saran perbaikan kurikulum atau program tanpa kata bersentimen. Label Positif pada versi sebelumnya berasal dari kecocokan "baik" di dalam kata "sebaiknya". Umpan balik Negatif, termasuk negasi seperti "tidak relevan", tetap terdeteksi bila ada (misalnya pada data riil).
 
 
 ## **Insight & Rekomendasi Kebijakan Awal**
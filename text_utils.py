@@ -0,0 +1,460 @@
+# text_utils.py
+import copy
+import re
+import threading
+import zlib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from cache_utils import per_version_resource
+from pool_utils import pool_map
+
+# -------------------------------------------------
+# Sentimen umpan balik (leksikon bahasa Indonesia)
+# -------------------------------------------------
+SENTIMENT_LABELS = ["Positive", "Neutral", "Negative"]
+# Naikkan setiap kali leksikon/aturan berubah: kolom Sentiment di snapshot
+# Parquet ikut versi ini sehingga dihitung ulang otomatis.
+SENTIMENT_LEXICON_VERSION = 2
+
+# Bobot kata (positif > 0, negatif < 0); dicocokkan per token utuh
+SENTIMENT_LEXICON = {
+    # positif
+    "baik": 1.0, "bagus": 1.0, "membantu": 1.0, "terbantu": 1.0, "bermanfaat": 1.0, "berguna": 1.0,
+    "positif": 1.0, "puas": 1.0, "memuaskan": 1.0, "senang": 1.0, "mantap": 1.0, "hebat": 1.0,
+    "relevan": 1.0, "sukses": 1.0, "unggul": 1.0, "berkualitas": 1.0, "recommend": 1.0, "recommended": 1.0,
+    "sesuai": 0.5, "lengkap": 0.5, "memadai": 0.5, "profesional": 0.5, "modern": 0.5,
+    # negatif
+    "buruk": -1.0, "jelek": -1.0, "kecewa": -1.0, "mengecewakan": -1.0, "usang": -1.0,
+    "ketinggalan": -1.0, "tertinggal": -1.0, "parah": -1.0, "menyulitkan": -1.0, "percuma": -1.0,
+    "sulit": -0.5, "susah": -0.5, "lambat": -0.5, "rumit": -0.5, "minim": -0.5, "lemah": -0.5,
+    "terbatas": -0.5, "mahal": -0.5, "kuno": -0.5,
+}
+# Negasi membalik polaritas kata sentimen pertama dalam NEGATION_SCOPE token berikutnya
+NEGATORS = frozenset(["tidak", "tak", "kurang", "belum", "bukan", "tanpa"])
+NEGATION_SCOPE = 3
+# Penguat/pelemah mengalikan bobot kata sentimen pertama dalam INTENSIFIER_SCOPE token berikutnya
+INTENSIFIERS = {"sangat": 1.5, "amat": 1.5, "paling": 1.5, "terlalu": 1.5, "benar": 1.25,
+                "cukup": 0.75, "agak": 0.5, "sedikit": 0.5}
+INTENSIFIER_SCOPE = 2
+# |skor| di bawah ambang → Neutral (mis. saran perbaikan tanpa kata sentimen)
+SENTIMENT_THRESHOLD = 0.5
+
+SENTIMENT_BATCH_TEXTS = 100_000
+SENTIMENT_PARALLEL_MIN_TEXTS = 200_000
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+|\n")
+
+def tokenize_batch(texts: list):
+    """Tokenize all texts with one regex pass over the joined corpus.
+
+    Returns (tokens, text_id) as flat arrays; text_id[i] is the index of the
+    text that token i came from.
+    """
+    corpus = "\n".join(str(t).replace("\n", " ") for t in texts).lower()
+    tokens = np.array(_TOKEN_RE.findall(corpus), dtype=object)
+    is_break = tokens == "\n"
+    text_id = np.cumsum(is_break)
+    return tokens[~is_break], text_id[~is_break]
+
+def _score_batch(texts: list) -> np.ndarray:
+    """Sentiment scores for a batch of texts, vectorized over the flat token stream."""
+    n = len(texts)
+    tokens, text_id = tokenize_batch(texts)
+    if len(tokens) == 0:
+        return np.zeros(n)
+    # Bobot, negasi, dan penguat dicari sekali per kosakata unik
+    vocab_codes, vocab = pd.factorize(tokens)
+    vocab = vocab.tolist()
+    weight = np.array([SENTIMENT_LEXICON.get(v, 0.0) for v in vocab])[vocab_codes]
+    is_neg = np.array([v in NEGATORS for v in vocab])[vocab_codes]
+    mult = np.array([INTENSIFIERS.get(v, 0.0) for v in vocab])[vocab_codes]
+
+    pos = np.arange(len(tokens))
+    start = np.searchsorted(text_id, text_id)  # posisi token pertama teks yang sama
+    is_sent = weight != 0
+    last_sent = np.maximum.accumulate(np.where(is_sent, pos, -1))
+    prev_sent = np.r_[-1, last_sent[:-1]]
+    last_neg = np.maximum.accumulate(np.where(is_neg, pos, -1))
+    last_int = np.maximum.accumulate(np.where(mult > 0, pos, -1))
+
+    # Pengubah hanya berlaku pada kata sentimen pertama setelahnya, dalam teks yang sama
+    negated = (last_neg >= start) & (last_neg > prev_sent) & (pos - last_neg <= NEGATION_SCOPE)
+    intensified = (last_int >= start) & (last_int > prev_sent) & (pos - last_int <= INTENSIFIER_SCOPE)
+    effective = weight * np.where(negated, -1.0, 1.0)
+    effective *= np.where(intensified, mult[np.maximum(last_int, 0)], 1.0)
+    return np.bincount(text_id[is_sent], weights=effective[is_sent], minlength=n)
+
+def _labels_from_scores(scores: np.ndarray) -> np.ndarray:
+    labels = np.full(len(scores), SENTIMENT_LABELS.index("Neutral"), dtype=np.int8)
+    labels[scores >= SENTIMENT_THRESHOLD] = SENTIMENT_LABELS.index("Positive")
+    labels[scores <= -SENTIMENT_THRESHOLD] = SENTIMENT_LABELS.index("Negative")
+    return labels
+
+def score_texts(texts: list) -> np.ndarray:
+    """Lexicon scores for a list of texts, in batches (on the shared process pool when large)."""
+    batches = [texts[i:i + SENTIMENT_BATCH_TEXTS] for i in range(0, len(texts), SENTIMENT_BATCH_TEXTS)]
+    if not batches:
+        return np.zeros(0)
+    scores = None
+    if len(texts) >= SENTIMENT_PARALLEL_MIN_TEXTS:
+        scores = pool_map(_score_batch, [(b,) for b in batches])
+    if scores is None:
+        scores = [_score_batch(b) for b in batches]
+    return np.concatenate(scores)
+
+def sentiment_label(text) -> str:
+    """Sentiment label for one feedback text."""
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return "Neutral"
+    return SENTIMENT_LABELS[_labels_from_scores(score_texts([text]))[0]]
+
+def score_sentiment(s: pd.Series) -> pd.Categorical:
+    """Sentiment for a feedback column, scored once per distinct text.
+
+    The column is factorized, only the unique texts are scored, and labels
+    are broadcast back by code. Missing text is Neutral.
+    """
+    codes, uniques = pd.factorize(s)
+    label_codes = np.append(_labels_from_scores(score_texts(list(uniques))), SENTIMENT_LABELS.index("Neutral"))
+    return pd.Categorical.from_codes(label_codes[codes], categories=SENTIMENT_LABELS)
+
+def annotate_sentiment(df: pd.DataFrame, column: str = "Umpan Balik") -> pd.DataFrame:
+    """Add a derived "Sentiment" column (unless the source already has one)."""
+    if column not in df.columns or "Sentiment" in df.columns:
+        return df
+    df["Sentiment"] = score_sentiment(df[column])
+    df.attrs["sentiment_lexicon_version"] = SENTIMENT_LEXICON_VERSION
+    return df
+
+# -------------------------------------------------
+# Kata kunci & topik umpan balik (n-gram + TF-IDF)
+# -------------------------------------------------
+STOPWORDS = frozenset("""
+    ada adalah agar akan atau bagi bahwa banyak bisa dalam dan dapat dari dengan di harus hal ini itu
+    jadi juga kami karena ke kita lagi lebih masih misal misalnya oleh pada para perlu saja saya
+    sebagai sebaiknya secara seperti serta sudah supaya tentang terhadap untuk yang
+""".split())
+TERM_CAPACITY = 5000        # jumlah n-gram maksimum yang dilacak penghitung streaming
+TERM_BATCH_TEXTS = 50_000   # teks unik per batch tokenisasi
+
+class TermCounter:
+    """Bounded-memory heavy-hitter counter (mergeable Misra-Gries summary).
+
+    Each update merges a batch of pre-aggregated term weights. When more
+    than `capacity` terms are tracked, the (capacity+1)-th largest count is
+    subtracted from every entry and entries that reach zero are dropped, so
+    any term heavier than total / (capacity + 1) is guaranteed to survive.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.terms = np.zeros(0, dtype=object)
+        self.counts = np.zeros(0)
+        self.total = 0.0
+
+    def update(self, terms: np.ndarray, weights: np.ndarray) -> None:
+        codes, uniques = pd.factorize(np.concatenate([self.terms, np.asarray(terms, dtype=object)]))
+        counts = np.bincount(codes, weights=np.concatenate([self.counts, weights]), minlength=len(uniques))
+        self.total += float(np.sum(weights))
+        if len(counts) > self.capacity:
+            floor = np.partition(counts, -(self.capacity + 1))[-(self.capacity + 1)]
+            counts = counts - floor
+            keep = counts > 0
+            uniques, counts = uniques[keep], counts[keep]
+        self.terms, self.counts = np.asarray(uniques, dtype=object), counts
+
+    def top(self, n: int = None) -> list:
+        ranked = sorted(zip(self.terms.tolist(), self.counts.tolist()), key=lambda kv: (-kv[1], kv[0]))
+        return ranked if n is None else ranked[:n]
+
+def batch_terms(texts: list):
+    """Unigrams and bigrams (stopwords dropped) of a batch of texts.
+
+    Returns (text_id, terms) as flat arrays; bigrams only join tokens that
+    were adjacent in the original text.
+    """
+    tokens, text_id = tokenize_batch(texts)
+    if len(tokens) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=object)
+    vocab_codes, vocab = pd.factorize(tokens)
+    keep_vocab = np.array([len(v) > 2 and v not in STOPWORDS for v in vocab], dtype=bool)
+    pos = np.flatnonzero(keep_vocab[vocab_codes])
+    kept, kept_text = tokens[pos], text_id[pos]
+    adjacent = (pos[1:] == pos[:-1] + 1) & (kept_text[1:] == kept_text[:-1])
+    bigrams = kept[:-1][adjacent] + " " + kept[1:][adjacent]
+    return np.concatenate([kept_text, kept_text[:-1][adjacent]]), np.concatenate([kept, bigrams])
+
+def build_term_index(s: pd.Series, capacity: int = TERM_CAPACITY, batch_texts: int = TERM_BATCH_TEXTS) -> dict:
+    """Sparse n-gram count matrix over the distinct texts of a feedback column.
+
+    Texts are tokenized once, batch by batch. A TermCounter
+    (weighted by how many rows share each text) bounds the vocabulary to
+    `capacity` terms; the result maps every row to a matrix row by code.
+    """
+    codes, uniques = pd.factorize(s)
+    uniques = list(uniques)
+    text_freq = np.bincount(codes[codes >= 0], minlength=len(uniques)).astype("float64")
+    counter = TermCounter(capacity)
+    batches = []
+    for start in range(0, len(uniques), batch_texts):
+        text_id, terms = batch_terms(uniques[start:start + batch_texts])
+        term_codes, batch_vocab = pd.factorize(terms)
+        text_id = text_id + start
+        weights = np.bincount(term_codes, weights=text_freq[text_id], minlength=len(batch_vocab))
+        counter.update(np.asarray(batch_vocab, dtype=object), weights)
+        # Pasangan (teks, term) unik per batch; term di luar kosakata akhir dibuang nanti
+        pair, pair_counts = np.unique(text_id * len(batch_vocab) + term_codes, return_counts=True)
+        batches.append((pair // len(batch_vocab), pair % len(batch_vocab), pair_counts, batch_vocab.tolist()))
+
+    vocab = [term for term, _ in counter.top()]
+    lookup = {term: i for i, term in enumerate(vocab)}
+    rows, cols, vals = [], [], []
+    for text_id, term_codes, counts, batch_vocab in batches:
+        remap = np.array([lookup.get(t, -1) for t in batch_vocab] + [-1], dtype=np.int64)[term_codes]
+        ok = remap >= 0
+        rows.append(text_id[ok])
+        cols.append(remap[ok])
+        vals.append(counts[ok])
+    matrix = sparse.csr_matrix(
+        (np.concatenate(vals or [np.zeros(0)]).astype("float64"),
+         (np.concatenate(rows or [np.zeros(0, dtype=np.int64)]), np.concatenate(cols or [np.zeros(0, dtype=np.int64)]))),
+        shape=(len(uniques), len(vocab)),
+    )
+    return {"codes": codes, "vocab": vocab, "matrix": matrix}
+
+def get_term_index(df: pd.DataFrame, column: str = "Umpan Balik") -> dict:
+    """Term index for df[column], built once per dataset version."""
+    return per_version_resource(df, "term_index", lambda d, c: build_term_index(d[c]), column)
+
+def top_terms(index: dict, group_codes: np.ndarray, labels: list, rows: np.ndarray = None, n: int = 10) -> pd.DataFrame:
+    """Top n terms per group by class-based TF-IDF (each group is one document).
+
+    Per-group term frequencies come from one sparse product
+    (group × text counts) @ (text × term matrix); no text is re-tokenized.
+    """
+    text_codes = index["codes"]
+    if rows is not None:
+        text_codes, group_codes = text_codes[rows], group_codes[rows]
+    ok = (text_codes >= 0) & (group_codes >= 0)
+    n_texts, n_groups = index["matrix"].shape[0], len(labels)
+    keys, counts = np.unique(group_codes[ok] * n_texts + text_codes[ok], return_counts=True)
+    group_texts = sparse.csr_matrix((counts.astype("float64"), (keys // n_texts, keys % n_texts)),
+                                    shape=(n_groups, n_texts))
+    tf = (group_texts @ index["matrix"]).tocsr()
+    group_df = np.bincount(tf.indices, minlength=tf.shape[1])
+    present = np.flatnonzero(np.diff(tf.indptr))
+    idf = np.log((1 + len(present)) / (1 + group_df)) + 1
+    group_rows = np.asarray(group_texts.sum(axis=1)).ravel()
+
+    out = []
+    for g in present:
+        lo, hi = tf.indptr[g], tf.indptr[g + 1]
+        terms, freq = tf.indices[lo:hi], tf.data[lo:hi]
+        score = freq / group_rows[g] * idf[terms]
+        k = min(n, len(score))
+        top = np.argpartition(-score, k - 1)[:k]
+        top = top[np.lexsort((terms[top], -score[top]))]
+        for rank, i in enumerate(top, 1):
+            out.append({"Kelompok": labels[g], "Peringkat": rank, "Term": index["vocab"][terms[i]],
+                        "Jumlah": int(freq[i]), "TF-IDF": float(score[i])})
+    return pd.DataFrame(out, columns=["Kelompok", "Peringkat", "Term", "Jumlah", "TF-IDF"])
+
+# -------------------------------------------------
+# Pengelompokan umpan balik hampir-sama (MinHash + LSH)
+# -------------------------------------------------
+NEAR_DUP_PERMUTATIONS = 64
+NEAR_DUP_BANDS = 16          # 16 band × 4 baris → kandidat mulai sekitar Jaccard 0.5
+NEAR_DUP_THRESHOLD = 0.5     # estimasi Jaccard minimum agar kandidat digabung
+NEAR_DUP_SHINGLE = 4         # panjang shingle karakter (tahan variasi imbuhan/ejaan)
+# Indeks versi sebelumnya dibangun ulang dari nol bila teks yang sudah tidak
+# muncul lebih banyak dari teks yang masih ada (indeks tidak tumbuh terus)
+NEAR_DUP_MAX_STALE_RATIO = 1.0
+_HASH_PRIME = np.uint64(4294967311)  # prima > 2^32
+
+def char_shingles(texts: list, k: int = NEAR_DUP_SHINGLE):
+    """Character k-gram shingles of each text after tokenizing and dropping stopwords.
+
+    Returns (text_id, shingles) as flat arrays.
+    """
+    tokens, text_id = tokenize_batch(texts)
+    if len(tokens) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=object)
+    vocab_codes, vocab = pd.factorize(tokens)
+    keep_vocab = np.array([v not in STOPWORDS for v in vocab], dtype=bool)
+    keep = keep_vocab[vocab_codes]
+    tokens, text_id = tokens[keep], text_id[keep]
+    starts = np.flatnonzero(np.r_[True, text_id[1:] != text_id[:-1]])
+    ids, shingles = [], []
+    for tid, words in zip(text_id[starts], np.split(tokens, starts[1:])):
+        normalized = " ".join(words)
+        grams = {normalized[i:i + k] for i in range(max(len(normalized) - k + 1, 1))}
+        ids.extend([tid] * len(grams))
+        shingles.extend(grams)
+    return np.array(ids, dtype=np.int64), np.array(shingles, dtype=object)
+
+class NearDuplicateIndex:
+    """Incremental MinHash-LSH index that groups near-identical texts.
+
+    Each text is shingled into character n-grams of its normalized,
+    stopword-free token stream and summarized by a MinHash signature. Signatures are split into bands;
+    texts sharing a band bucket are candidates, and candidates whose
+    estimated Jaccard similarity reaches `threshold` are merged with
+    union-find. add() can be called repeatedly as new texts arrive.
+    """
+
+    def __init__(self, num_perm: int = NEAR_DUP_PERMUTATIONS, bands: int = NEAR_DUP_BANDS,
+                 threshold: float = NEAR_DUP_THRESHOLD, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # Hash multiply-shift: ((a·x + b) mod 2^64) >> 32, a ganjil
+        self._a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+        self.bands, self.rows = bands, num_perm // bands
+        self.threshold = threshold
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._buckets = [{} for _ in range(bands)]
+        self._parent = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    def _signature_batch(self, texts: list):
+        text_id, shingles = char_shingles(texts)
+        signatures = np.full((len(self._a), len(texts)), np.iinfo(np.uint32).max, dtype=np.uint32)
+        has_shingles = np.zeros(len(texts), dtype=bool)
+        if len(shingles) == 0:
+            return signatures.T, has_shingles
+        # Hash dihitung per shingle unik, lalu diambil per kemunculan
+        codes, vocab = pd.factorize(shingles)
+        hashes = np.array([zlib.crc32(g.encode("utf-8")) for g in vocab], dtype=np.uint64)
+        starts = np.flatnonzero(np.r_[True, text_id[1:] != text_id[:-1]])  # text_id sudah terurut
+        present = text_id[starts]
+        with np.errstate(over="ignore"):
+            for i, (a, b) in enumerate(zip(self._a, self._b)):
+                permuted = ((hashes * a + b) >> np.uint64(32)).astype(np.uint32)
+                signatures[i, present] = np.minimum.reduceat(permuted[codes], starts)
+        has_shingles[present] = True
+        return signatures.T, has_shingles
+
+    def _find(self, i: int) -> int:
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def add(self, texts: list) -> np.ndarray:
+        """Index a batch of texts; returns their ids (positions in the index)."""
+        offset = len(self._parent)
+        ids = np.arange(offset, offset + len(texts))
+        signatures, has_shingles = self._signature_batch(texts)
+        self._signatures = np.concatenate([self._signatures, signatures])
+        self._parent = np.concatenate([self._parent, ids])
+
+        # Kandidat: anggota pertama bucket band yang sama (dalam batch & dari batch sebelumnya)
+        members = ids[has_shingles]
+        pairs = []
+        for band, bucket in enumerate(self._buckets):
+            block = signatures[has_shingles, band * self.rows:(band + 1) * self.rows].astype(np.uint64)
+            # Kunci band = gabungan nilai MinHash baris band menjadi satu integer 64-bit
+            keys = np.zeros(len(block), dtype=np.uint64)
+            with np.errstate(over="ignore"):
+                for col in block.T:
+                    keys = keys * np.uint64(0x9E3779B97F4A7C15) + col
+            key_codes, uniques = pd.factorize(keys.view(np.int64))
+            _, first = np.unique(key_codes, return_index=True)
+            anchor = np.array([bucket.setdefault(key, members[first[c]]) for c, key in enumerate(uniques.tolist())],
+                              dtype=np.int64)
+            pairs.append(members * (offset + len(texts)) + anchor[key_codes])
+        size = offset + len(texts)
+        pairs = np.unique(np.concatenate(pairs or [np.zeros(0, dtype=np.int64)]))
+        pairs = np.column_stack([pairs // size, pairs % size])
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        similar = (self._signatures[pairs[:, 0]] == self._signatures[pairs[:, 1]]).mean(axis=1) >= self.threshold
+        # Gabung hanya bila kedua akar klaster juga mirip (mencegah rantai yang melebar)
+        for a, b in pairs[similar]:
+            ra, rb = self._find(a), self._find(b)
+            if ra != rb and np.mean(self._signatures[ra] == self._signatures[rb]) >= self.threshold:
+                self._parent[max(ra, rb)] = min(ra, rb)
+        return ids
+
+    def clusters(self) -> np.ndarray:
+        """Cluster id (root text id) for every indexed text."""
+        parent = self._parent.copy()
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                return parent
+            parent = grand
+
+def build_near_dup_index(s: pd.Series, batch_texts: int = TERM_BATCH_TEXTS, previous: dict = None) -> dict:
+    """Near-duplicate clusters over the distinct texts of a feedback column.
+
+    With `previous` (the result for an earlier version of the column), a copy
+    of its index is extended with add() for the texts it has not seen yet;
+    texts that disappeared stay in the index with no rows. "texts" then lists
+    every indexed text and "codes" point into it.
+    """
+    # Teks kosong diperlakukan sebagai tidak ada umpan balik
+    codes, uniques = pd.factorize(s.where(s.astype(str).str.strip() != ""))
+    texts = [str(u) for u in uniques]
+    known = []
+    if previous is not None:
+        known = previous["texts"]
+        seen = set(known)
+        live = sum(t in seen for t in texts)
+        if len(known) - live > NEAR_DUP_MAX_STALE_RATIO * len(texts):
+            known = []
+    lookup = {t: i for i, t in enumerate(known)}
+    new = [t for t in texts if t not in lookup]
+    index = copy.deepcopy(previous["index"]) if known else NearDuplicateIndex()
+    for start in range(0, len(new), batch_texts):
+        index.add(new[start:start + batch_texts])
+    lookup.update((t, len(known) + i) for i, t in enumerate(new))
+    remap = np.array([lookup[t] for t in texts] + [-1], dtype=np.int64)
+    return {"codes": remap[codes], "texts": known + new, "cluster": index.clusters(), "index": index}
+
+# Hasil versi terakhir per kolom: dasar build inkremental untuk versi berikutnya
+_NEAR_DUP_LATEST = {}
+_NEAR_DUP_LOCK = threading.Lock()
+
+def _build_near_dup_from_latest(df: pd.DataFrame, column: str) -> dict:
+    with _NEAR_DUP_LOCK:
+        previous = _NEAR_DUP_LATEST.get(column)
+    result = build_near_dup_index(df[column], previous=previous)
+    with _NEAR_DUP_LOCK:
+        _NEAR_DUP_LATEST[column] = result
+    return result
+
+def get_near_dup_index(df: pd.DataFrame, column: str = "Umpan Balik") -> dict:
+    """Near-duplicate index for df[column], built once per dataset version.
+
+    A new version starts from the previous version's index and only indexes
+    the distinct texts that are new.
+    """
+    return per_version_resource(df, "near_dup_index", _build_near_dup_from_latest, column)
+
+def near_duplicate_groups(index: dict, rows: np.ndarray = None, top: int = 10) -> pd.DataFrame:
+    """Largest near-duplicate groups among the selected rows.
+
+    Jumlah = rows in the group, Variasi = distinct texts, Contoh = the most
+    frequent text of the group (its representative).
+    """
+    codes = index["codes"] if rows is None else index["codes"][rows]
+    text_counts = np.bincount(codes[codes >= 0], minlength=len(index["texts"]))
+    present = np.flatnonzero(text_counts)
+    if len(present) == 0:
+        return pd.DataFrame(columns=["Jumlah", "Variasi", "Contoh"])
+    cluster = index["cluster"][present]
+    counts = text_counts[present]
+    order = np.lexsort((present, -counts, cluster))
+    cluster, counts, present = cluster[order], counts[order], present[order]
+    starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+    totals = np.add.reduceat(counts, starts)
+    variants = np.diff(np.r_[starts, len(cluster)])
+    rank = np.argsort(-totals, kind="stable")[:top]
+    return pd.DataFrame({
+        "Jumlah": totals[rank],
+        "Variasi": variants[rank],
+        "Contoh": [index["texts"][present[starts[i]]] for i in rank],
+    })
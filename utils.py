@@ -1,12 +1,229 @@
 # utils.py
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
 import streamlit as st
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+from cache_utils import per_version_resource
+from geo_utils import annotate_provinces, canonical_location, map_categories
+from text_utils import SENTIMENT_LEXICON_VERSION, annotate_sentiment
 
 CSV_PATH = "new_tracer_alumni_elektro_unsika.csv"
 
-@st.cache_data
+# Snapshot kolumnar hasil pembersihan (Parquet), disimpan per hash isi CSV.
+# Naikkan NORMALIZATION_VERSION setiap kali langkah pembersihan di
+# _clean_frame berubah agar snapshot lama tidak dipakai lagi.
+SNAPSHOT_DIR = ".snapshot_cache"
+NORMALIZATION_VERSION = 4
+
+# CSV yang lebih besar dari ambang ini dibaca bertahap (streaming) per
+# CHUNK_ROWS baris agar puncak memori tidak berlipat dari ukuran file.
+STREAMING_THRESHOLD_BYTES = 256 * 1024 * 1024
+CHUNK_ROWS = 200_000
+
+# Skema ringkas keluaran load_data: teks berkardinalitas rendah → Categorical
+# (urutan kategori terurut, stabil antar versi), numerik → dtype terkecil.
+CATEGORY_COLUMNS = [
+    "Program Studi",
+    "Konsentrasi",
+    "Lokasi Geografis",
+    "Provinsi",
+    "Bidang Industri",
+    "Domisili",
+    "Perusahaan",
+    "Posisi/Jabatan",
+    "Penempatan Kerja",
+    "Pengalaman Magang",
+    "Aktivitas Ekstrakurikuler",
+]
+NUMERIC_DTYPES = {
+    "Tahun Angkatan": "int16",
+    "Masa Tunggu Kerja": "int16",
+    "IPK": "float32",
+    "Relevansi Kurikulum": "float32",
+    "Gaji": "int32",
+}
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of the file content, read in blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# path absolut → (mtime_ns, size, versi); dipakai lintas sesi dalam satu proses
+_FINGERPRINTS: dict = {}
+
+def dataset_version(path: str = CSV_PATH) -> str:
+    """Short content fingerprint of the CSV.
+
+    Fast path: if mtime and size are unchanged the previous fingerprint is
+    reused; otherwise the content is re-hashed, so a touched-but-identical
+    file keeps its version.
+    """
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    cached = _FINGERPRINTS.get(key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    version = file_digest(path)[:16]
+    _FINGERPRINTS[key] = (stat.st_mtime_ns, stat.st_size, version)
+    return version
+
+def _snapshot_prefix(path: str) -> str:
+    """File-name prefix unique to one source CSV (stem + hash of its absolute path)."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    path_hash = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    return f"{stem}-{path_hash}-"
+
+def _snapshot_path(path: str, version: str) -> str:
+    # Kolom turunan (Sentiment) ikut versi leksikonnya
+    tag = f"v{NORMALIZATION_VERSION}s{SENTIMENT_LEXICON_VERSION}"
+    return os.path.join(SNAPSHOT_DIR, f"{_snapshot_prefix(path)}{version}-{tag}.parquet")
+
+def _read_snapshot(snap_path: str):
+    if not os.path.exists(snap_path):
+        return None
+    try:
+        return pd.read_parquet(snap_path)
+    except Exception:
+        # Snapshot rusak / pyarrow tidak tersedia → bersihkan ulang dari CSV
+        return None
+
+def _write_snapshot(df: pd.DataFrame, snap_path: str, prefix: str) -> None:
+    """Write snapshot atomically and drop stale snapshots of the same CSV (same prefix)."""
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp_path = snap_path + ".tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, snap_path)
+    except Exception:
+        # Cache bersifat opsional (mis. filesystem read-only)
+        return
+    for name in os.listdir(SNAPSHOT_DIR):
+        full = os.path.join(SNAPSHOT_DIR, name)
+        if name.startswith(prefix) and name.endswith(".parquet") and full != snap_path:
+            try:
+                os.remove(full)
+            except OSError:
+                pass
+
 def load_data(path: str = CSV_PATH) -> pd.DataFrame:
-    df = pd.read_csv(path)
+    """Load the cleaned dataset; reloads only when the CSV content changes.
+
+    The frame is shared by every rerun and session (no per-call copy):
+    callers must not mutate it. Filter with apply_filters() and add page
+    columns to that result instead.
+    """
+    return _load_version(path, dataset_version(path))
+
+@st.cache_resource(max_entries=2)
+def _load_version(path: str, version: str) -> pd.DataFrame:
+    # `version` hanya dipakai sebagai bagian cache key st.cache_resource
+    snap_path = _snapshot_path(path, version)
+    df = _read_snapshot(snap_path)
+    if df is None:
+        # Tahap anotasi turunan dijalankan sekali per versi data, lalu disimpan di snapshot
+        df = compact_dtypes(annotate_sentiment(annotate_provinces(_read_clean(path))))
+        _write_snapshot(df, snap_path, _snapshot_prefix(path))
+    df.attrs["dataset_version"] = version
+    return df
+
+def _read_clean(path: str) -> pd.DataFrame:
+    if os.path.getsize(path) < STREAMING_THRESHOLD_BYTES:
+        return _clean_frame(pd.read_csv(path))
+    return _read_clean_chunked(path)
+
+def _read_clean_chunked(path: str, chunk_rows: int = CHUNK_ROWS) -> pd.DataFrame:
+    """Streaming mode: clean each chunk, keep CATEGORY_COLUMNS as categorical, then concat."""
+    parts = []
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        chunk = _clean_frame(chunk)
+        for col in CATEGORY_COLUMNS:
+            if col in chunk.columns:
+                chunk[col] = _text_category(chunk[col])
+        parts.append(chunk)
+    if not parts:
+        return _clean_frame(pd.read_csv(path))
+    return _concat_chunks(parts, CATEGORY_COLUMNS)
+
+def _text_category(s: pd.Series) -> pd.Series:
+    """Categorical of str values with object-dtype categories.
+
+    A chunk where the column is entirely empty is read as float; forcing
+    str values / object categories keeps every chunk union-compatible.
+    """
+    values = s.astype(object).where(s.notna(), None)
+    values = values.where(values.isna(), values.astype(str))
+    categories = pd.Index(sorted(values.dropna().unique()), dtype=object)
+    return values.astype(pd.CategoricalDtype(categories))
+
+def _concat_chunks(parts: list, cat_cols: list) -> pd.DataFrame:
+    # Samakan kategori antar chunk agar pd.concat tidak kembali ke object
+    for col in cat_cols:
+        if not all(col in p.columns for p in parts):
+            continue
+        categories = union_categoricals([p[col] for p in parts], ignore_order=True).categories
+        for p in parts:
+            p[col] = p[col].cat.set_categories(categories)
+    return pd.concat(parts, ignore_index=True)
+
+def _fits_int(s: pd.Series, dtype: str) -> bool:
+    values = s.to_numpy(dtype="float64")
+    if np.isnan(values).any() or not np.all(np.mod(values, 1) == 0):
+        return False
+    info = np.iinfo(dtype)
+    return len(values) == 0 or (values.min() >= info.min and values.max() <= info.max)
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert to the compact schema and record a before/after memory report.
+
+    Integer targets fall back to float32 when a column has missing or
+    out-of-range values. The report is stored in ``df.attrs["memory_report"]``.
+    """
+    before = df.memory_usage(deep=True)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories = sorted(values.cat.categories)
+            else:
+                categories = sorted(values.dropna().unique())
+            df[col] = pd.Categorical(values, categories=categories)
+    for col, dtype in NUMERIC_DTYPES.items():
+        if col in df.columns:
+            if dtype.startswith("int") and not _fits_int(df[col], dtype):
+                dtype = "float32"
+            df[col] = df[col].astype(dtype)
+    after = df.memory_usage(deep=True)
+
+    df.attrs["memory_report"] = {
+        "before_bytes": int(before.sum()),
+        "after_bytes": int(after.sum()),
+        "columns": {
+            str(col): {"before": int(before[col]), "after": int(after[col]), "dtype": str(df[col].dtype)}
+            for col in df.columns
+        },
+    }
+    return df
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-column memory table (bytes before/after compact_dtypes)."""
+    report = df.attrs.get("memory_report") or {}
+    rows = [
+        {"Kolom": col, "Dtype": info["dtype"], "Sebelum (byte)": info["before"], "Sesudah (byte)": info["after"]}
+        for col, info in report.get("columns", {}).items()
+    ]
+    return pd.DataFrame(rows, columns=["Kolom", "Dtype", "Sebelum (byte)", "Sesudah (byte)"])
+
+def _clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename, normalize text/province and coerce numeric columns."""
     # Basic cleaning safety (ensure expected columns exist)
     # Normalize column names (strip)
     df.columns = [c.strip() for c in df.columns]
@@ -50,26 +267,9 @@ def load_data(path: str = CSV_PATH) -> pd.DataFrame:
             if col == "Lokasi Geografis":
                 df[col] = df[col].str.title()
 
-    # Standardize province names used by the choropleth in app.py
+    # Standardize province names (aliases → canonical) via the shared gazetteer
     if "Lokasi Geografis" in df.columns:
-        mapping_prov = {
-            "Dki Jakarta": "DKI Jakarta",
-            "Jakarta": "DKI Jakarta",
-            "Jawa barat": "Jawa Barat",
-            "Jawa timur": "Jawa Timur",
-            "Jawa tengah": "Jawa Tengah",
-            "Yogyakarta": "DI Yogyakarta",
-            "Daerah Istimewa Yogyakarta": "DI Yogyakarta",
-            "Aceh darussalam": "Aceh",
-            "Kepulauan riau": "Kepulauan Riau",
-            "Bangka belitung": "Kep. Bangka Belitung",
-            "Kepulauan Bangka Belitung": "Kep. Bangka Belitung",
-            "Papua barat": "Papua Barat",
-            "Papua selatan": "Papua Selatan",
-            "Papua tengah": "Papua Tengah",
-            "Papua pegunungan": "Papua Pegunungan",
-        }
-        df["Lokasi Geografis"] = df["Lokasi Geografis"].replace(mapping_prov)
+        df["Lokasi Geografis"] = map_categories(df["Lokasi Geografis"], canonical_location).astype(object)
 
     # Convert numeric columns safely
     for col in [
@@ -93,63 +293,296 @@ def load_data(path: str = CSV_PATH) -> pd.DataFrame:
     return df
 
 def init_filters(df: pd.DataFrame):
-    """Render global sidebar filters and store selections in session_state."""
-    if "filters_initialized" not in st.session_state:
-        st.session_state.filters_initialized = True
+    """Render global sidebar filters and store selections in session_state.
 
-        # Unique sorted lists (safeguard missing columns)
-        years = sorted(df["Tahun Angkatan"].dropna().unique().tolist()) if "Tahun Angkatan" in df.columns else []
-        kons = sorted(df["Konsentrasi"].dropna().unique().tolist()) if "Konsentrasi" in df.columns else []
-        lokasi = sorted(df["Lokasi Geografis"].dropna().unique().tolist()) if "Lokasi Geografis" in df.columns else []
-        prog = sorted(df["Program Studi"].dropna().unique().tolist()) if "Program Studi" in df.columns else []
+    Options cascade: each filter only offers values that still have rows
+    under the other active filters (plus whatever is already selected),
+    labelled with their row counts. Counts come from the filter index.
+    """
+    index = get_filter_index(df)
 
-        # Defaults: all selected
-        st.session_state.filter_tahun = years.copy()
-        st.session_state.filter_konsentrasi = kons.copy()
-        st.session_state.filter_lokasi = lokasi.copy()
-        st.session_state.filter_program = prog.copy()
+    # Re-init when the dataset version changes so stale selections are dropped
+    version = df.attrs.get("dataset_version")
+    if "filters_initialized" not in st.session_state or st.session_state.get("filters_version") != version:
+        st.session_state.filters_initialized = True
+        st.session_state.filters_version = version
 
-    # Render widgets (always show, values read/write session_state)
+        # Defaults: all selected (safeguard missing columns)
+        for key in FILTER_COLUMNS:
+            dim = index["dims"].get(key)
+            st.session_state[key] = list(dim["values"]) if dim else []
+
+    # Render widgets (always show, values read/write session_state).
+    # Tiap widget punya key sendiri; on_change menyalin pilihan baru ke key
+    # filter sebelum halaman dijalankan ulang, sehingga semua hitungan cascade
+    # di bawah sudah memakai seluruh pilihan terbaru.
     st.sidebar.header("🔎 Filter Global")
-    # Tahun
-    years_options = sorted(df["Tahun Angkatan"].dropna().unique().tolist()) if "Tahun Angkatan" in df.columns else []
-    st.session_state.filter_tahun = st.sidebar.multiselect("Tahun Angkatan", years_options,
-                                                            default=st.session_state.get("filter_tahun", years_options))
-    # Program Studi
-    prog_options = sorted(df["Program Studi"].dropna().unique().tolist()) if "Program Studi" in df.columns else []
-    st.session_state.filter_program = st.sidebar.multiselect("Program Studi", prog_options,
-                                                             default=st.session_state.get("filter_program", prog_options))
-    # Konsentrasi
-    kons_options = sorted(df["Konsentrasi"].dropna().unique().tolist()) if "Konsentrasi" in df.columns else []
-    st.session_state.filter_konsentrasi = st.sidebar.multiselect("Konsentrasi", kons_options,
-                                                                 default=st.session_state.get("filter_konsentrasi", kons_options))
-    # Lokasi
-    lok_options = sorted(df["Lokasi Geografis"].dropna().unique().tolist()) if "Lokasi Geografis" in df.columns else []
-    st.session_state.filter_lokasi = st.sidebar.multiselect("Lokasi Geografis", lok_options,
-                                                            default=st.session_state.get("filter_lokasi", lok_options))
+    st.sidebar.caption(f"📦 Versi dataset: `{version or '-'}`")
+    for key in FILTER_COLUMNS:
+        dim = index["dims"].get(key)
+        if dim is not None:
+            st.session_state[key] = [v for v in (st.session_state.get(key) or []) if v in dim["lookup"]]
+    filters = session_filters()
+    for key, col in FILTER_COLUMNS.items():
+        dim = index["dims"].get(key)
+        if dim is None:
+            st.session_state[key] = st.sidebar.multiselect(col, [], default=[])
+            continue
+        selected = st.session_state[key]
+        counts = option_counts(index, filters, key)
+        chosen = set(selected)
+        options = [v for v, c in zip(dim["values"], counts) if c > 0 or v in chosen]
+        widget_key = f"{key}_widget"
+        st.session_state[widget_key] = selected
+        st.sidebar.multiselect(
+            col,
+            options,
+            key=widget_key,
+            on_change=_sync_filter,
+            args=(key,),
+            format_func=lambda v, _dim=dim, _counts=counts: f"{v} ({_counts[_dim['lookup'][v] - 1]:,})",
+        )
+    render_cache_stats()
+
+def _sync_filter(key: str) -> None:
+    st.session_state[key] = st.session_state[f"{key}_widget"]
+
+# Filter global: key session_state → kolom
+FILTER_COLUMNS = {
+    "filter_tahun": "Tahun Angkatan",
+    "filter_program": "Program Studi",
+    "filter_konsentrasi": "Konsentrasi",
+    "filter_lokasi": "Lokasi Geografis",
+}
+
+def _dim_codes(s: pd.Series):
+    """Sorted distinct values and int32 codes shifted by one (0 = missing)."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        values = s.cat.categories.tolist()
+        codes = s.cat.codes.to_numpy()
+    else:
+        codes, uniques = pd.factorize(s, sort=True)
+        values = uniques.tolist()
+    return values, (codes + 1).astype(np.int32)
+
+def build_filter_index(df: pd.DataFrame) -> dict:
+    """Integer-code index over the global filter columns.
+
+    Rows are grouped into "cells" (distinct combinations of the filter
+    columns). A selection is resolved per cell first, then broadcast to
+    rows with a single gather, so filtering never scans the string columns.
+    """
+    dims = {}
+    code_cols = []
+    for key, col in FILTER_COLUMNS.items():
+        if col not in df.columns:
+            continue
+        values, codes = _dim_codes(df[col])
+        dims[key] = {
+            "column": col,
+            "values": values,
+            "lookup": {v: i + 1 for i, v in enumerate(values)},
+            # Baris dengan nilai kosong hanya lolos bila filter ini tidak aktif
+            "has_missing": bool((codes == 0).any()),
+        }
+        code_cols.append(codes)
+
+    if code_cols:
+        stacked = np.column_stack(code_cols)
+        cell_codes, cell = np.unique(stacked, axis=0, return_inverse=True)
+        cell = cell.reshape(-1).astype(np.int32)
+    else:
+        cell_codes = np.zeros((1, 0), dtype=np.int32)
+        cell = np.zeros(len(df), dtype=np.int32)
+
+    return {
+        "n_rows": len(df),
+        "dims": dims,
+        "dim_order": list(dims),
+        "cell": cell,
+        "cell_codes": cell_codes,
+        "cell_counts": np.bincount(cell, minlength=len(cell_codes)),
+    }
+
+def get_filter_index(df: pd.DataFrame) -> dict:
+    """Filter index for df, built once per dataset version and shared across sessions."""
+    return per_version_resource(df, "filter_index", build_filter_index)
+
+def cell_mask(index: dict, filters: dict):
+    """Boolean mask over cells: OR within a filter, AND across filters (None = all)."""
+    mask = None
+    for d, key in enumerate(index["dim_order"]):
+        selected = filters.get(key)
+        # Seleksi kosong diperlakukan sebagai 'tanpa filter'
+        if not selected:
+            continue
+        dim = index["dims"][key]
+        lut = np.zeros(len(dim["values"]) + 1, dtype=bool)
+        for v in selected:
+            code = dim["lookup"].get(v)
+            if code is not None:
+                lut[code] = True
+        dim_mask = lut[index["cell_codes"][:, d]]
+        mask = dim_mask if mask is None else (mask & dim_mask)
+    return mask
+
+def session_filters() -> dict:
+    return {key: st.session_state.get(key, None) for key in FILTER_COLUMNS}
+
+def filter_key(df: pd.DataFrame, filters: dict = None) -> tuple:
+    """Normalized, hashable filter state.
+
+    Selections are stored as sorted codes, and a selection that covers every
+    value is treated like an empty one, so all users on the default
+    "everything selected" state share the same key. That only holds when the
+    column has no missing values: otherwise a full selection still drops the
+    missing rows (see cell_mask) and keeps its own key.
+    """
+    if filters is None:
+        filters = session_filters()
+    index = get_filter_index(df)
+    key = []
+    for name in index["dim_order"]:
+        dim = index["dims"][name]
+        codes = sorted({dim["lookup"][v] for v in (filters.get(name) or []) if v in dim["lookup"]})
+        if filters.get(name) and (len(codes) < len(dim["values"]) or dim["has_missing"]):
+            key.append((name, tuple(codes)))
+    return tuple(key)
+
+def option_counts(index: dict, filters: dict, key: str) -> np.ndarray:
+    """Row count per value of one filter, given the selections of the other filters."""
+    d = index["dim_order"].index(key)
+    others = {k: v for k, v in filters.items() if k != key}
+    mask = cell_mask(index, others)
+    codes = index["cell_codes"][:, d]
+    weights = index["cell_counts"]
+    if mask is not None:
+        codes, weights = codes[mask], weights[mask]
+    counts = np.bincount(codes, weights=weights, minlength=len(index["dims"][key]["values"]) + 1)
+    return counts[1:].astype(np.int64)
+
+def filter_rows(df: pd.DataFrame, filters: dict = None):
+    """Positional row indices selected by the filters, or None when nothing is filtered."""
+    if filters is None:
+        filters = session_filters()
+    return cached_aggregate(df, "filter_rows", lambda: _filter_rows(df, filters), filters=filters)
+
+def _filter_rows(df: pd.DataFrame, filters: dict):
+    index = get_filter_index(df)
+    mask = cell_mask(index, filters)
+    if mask is None:
+        return None
+    return np.flatnonzero(mask[index["cell"]])
 
 def apply_filters(df: pd.DataFrame) -> pd.DataFrame:
     """Return dataframe after applying global filters from session_state"""
-    df2 = df.copy()
-    # Apply filters if selections exist; if empty selection treat as 'no filter' (show all)
-    ft = st.session_state.get("filter_tahun", None)
-    if ft:
-        if "Tahun Angkatan" in df2.columns:
-            df2 = df2[df2["Tahun Angkatan"].isin(ft)]
-
-    fp = st.session_state.get("filter_program", None)
-    if fp:
-        if "Program Studi" in df2.columns:
-            df2 = df2[df2["Program Studi"].isin(fp)]
-
-    fk = st.session_state.get("filter_konsentrasi", None)
-    if fk:
-        if "Konsentrasi" in df2.columns:
-            df2 = df2[df2["Konsentrasi"].isin(fk)]
-
-    fl = st.session_state.get("filter_lokasi", None)
-    if fl:
-        if "Lokasi Geografis" in df2.columns:
-            df2 = df2[df2["Lokasi Geografis"].isin(fl)]
-
-    return df2
+    rows = filter_rows(df)
+    if rows is None:
+        # Tanpa filter aktif: shallow copy, kolom baru di halaman tidak menyentuh df
+        return df.copy(deep=False)
+    return df.take(rows)
+
+# -------------------------------------------------
+# Cache bersama lintas sesi (LRU + TTL + batas byte)
+# -------------------------------------------------
+SHARED_CACHE_MAX_BYTES = 256 * 1024 * 1024
+SHARED_CACHE_TTL_SECONDS = 30 * 60
+
+def _estimate_nbytes(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_nbytes(k) + _estimate_nbytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_nbytes(v) for v in value)
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + _estimate_nbytes(vars(value))
+    return sys.getsizeof(value)
+
+class SharedCache:
+    """Thread-safe LRU cache with per-entry TTL and a total byte budget."""
+
+    def __init__(self, max_bytes: int = SHARED_CACHE_MAX_BYTES, ttl: float = SHARED_CACHE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, nbytes, value)
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key) -> None:
+        _, nbytes, _ = self._entries.pop(key)
+        self.nbytes -= nbytes
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, value) -> None:
+        nbytes = _estimate_nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, nbytes, value)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+@st.cache_resource
+def get_shared_cache() -> SharedCache:
+    return SharedCache()
+
+def cached_aggregate(df: pd.DataFrame, name: str, compute, *params, filters: dict = None):
+    """Memoize compute() across sessions under (name, dataset version, filter state, params).
+
+    Cached values are shared objects: callers must not mutate them.
+    """
+    version = df.attrs.get("dataset_version")
+    if version is None:
+        return compute()
+    key = (name, version, filter_key(df, filters), params)
+    return get_shared_cache().get_or_compute(key, compute)
+
+def render_cache_stats() -> None:
+    """Show shared cache counters in the sidebar."""
+    stats = get_shared_cache().stats()
+    st.sidebar.caption(
+        f"🗄️ Cache bersama: {stats['hits']} hit · {stats['misses']} miss · "
+        f"{stats['entries']} entri ({stats['bytes'] / 1024**2:,.1f} MB)"
+    )